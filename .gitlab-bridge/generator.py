@@ -10,15 +10,93 @@ The same FCM source produces different outputs for different platforms:
 - GitLab: job templates + pipeline includes
 """
 
+import io
 import os
-import re
-import json
-import yaml
-import hashlib
-from datetime import datetime
+import sys
+import functools
+import contextlib
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
 
+GENERATOR_VERSION = 'gitlab-bridge-1.0.0'
+
+# Marks a parameter or dependency as not required
+_OPTIONAL_SUFFIX = '(optional)'
+
+# Header field name -> key in parsed FCM data
+_HEADER_KEYS = {
+    'Model': 'model',
+    'Version': 'version',
+    'Layer': 'layer',
+    'Domain': 'domain',
+    'Capability': 'capability'
+}
+
+# Below this many FCM files, worker start-up costs more than it saves
+_PARALLEL_MIN_FILES = 8
+
+# PyYAML, json, hashlib, datetime and the process pool are imported where
+# they are first needed so that `main()` exits fast when axioms are missing
+
+
+@functools.lru_cache(maxsize=None)
+def _yaml_dumper():
+    """Return the fastest safe PyYAML dumper available"""
+    import yaml
+    # Prefer the libyaml-backed dumper when PyYAML was built with it
+    return getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+
+@functools.lru_cache(maxsize=None)
+def _orjson():
+    """Return the orjson module, or None if it is not installed"""
+    try:
+        import orjson  # Optional, faster .bridge-sync encoding
+    except ImportError:
+        return None
+    return orjson
+
+
+def _utc_timestamp() -> str:
+    """Return the current UTC time as an ISO 8601 string"""
+    from datetime import datetime
+    return datetime.utcnow().isoformat() + 'Z'
+
+
+def _iter_fcm_files(root: str):
+    """Yield .fcm file paths under root, depth-first in directory order"""
+    subdirs = []
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.name.endswith('.fcm') and entry.is_file():
+                yield entry.path
+    
+    for subdir in subdirs:
+        yield from _iter_fcm_files(subdir)
+
+
+def _list_yml_files(directory: Path) -> List[str]:
+    """Return sorted names of .yml files directly inside directory"""
+    with os.scandir(directory) as entries:
+        return sorted(entry.name for entry in entries
+                      if entry.name.endswith('.yml') and entry.is_file())
+
+
+def _read_model(fcm_path: Path) -> Optional[str]:
+    """Return the Model header of an FCM file without parsing the rest"""
+    try:
+        with open(fcm_path, encoding='utf-8') as f:
+            for line in f:
+                head, sep, rest = line.strip().partition(':')
+                if sep and head == 'Model':
+                    return rest.strip()
+    except (OSError, UnicodeDecodeError):
+        pass
+    return None
+
+
 class FCMParser:
     """Parse FCM (Formal Conceptual Model) files"""
     
@@ -28,9 +106,12 @@ class FCMParser:
         self.data = self._parse()
     
     def _read_file(self) -> str:
-        """Read FCM file content"""
-        with open(self.fcm_path, 'r') as f:
-            return f.read()
+        """Read FCM file content, hashing the same bytes that are decoded"""
+        import hashlib
+        with open(self.fcm_path, 'rb') as f:
+            raw = f.read()
+        self._checksum = hashlib.sha256(raw).hexdigest()
+        return raw.decode('utf-8')
     
     def _parse(self) -> Dict[str, Any]:
         """Parse FCM format into structured data"""
@@ -41,6 +122,7 @@ class FCMParser:
             'domain': None,
             'capability': None,
             'parameters': [],
+            'parameters_by_name': {},
             'outputs': [],
             'interface': {},
             'dependencies': [],
@@ -48,28 +130,22 @@ class FCMParser:
         }
         
         current_section = None
-        lines = self.content.strip().split('\n')
         
-        for line in lines:
+        for line in self.content.splitlines():
             line = line.strip()
             if not line or line.startswith('#'):
                 continue
-                
+            
             # Parse header fields
-            if line.startswith('Model:'):
-                data['model'] = line.split(':', 1)[1].strip()
-            elif line.startswith('Version:'):
-                data['version'] = line.split(':', 1)[1].strip()
-            elif line.startswith('Layer:'):
-                data['layer'] = line.split(':', 1)[1].strip()
-            elif line.startswith('Domain:'):
-                data['domain'] = line.split(':', 1)[1].strip()
-            elif line.startswith('Capability:'):
-                data['capability'] = line.split(':', 1)[1].strip()
+            head, sep, rest = line.partition(':')
+            if sep and head in _HEADER_KEYS:
+                data[_HEADER_KEYS[head]] = rest.strip()
             
             # Parse sections
             elif line.endswith(':') and not line.startswith('-'):
-                current_section = line[:-1].lower()
+                # Interned so comparisons against the section literals hit
+                # the identity fast path
+                current_section = sys.intern(line[:-1].lower())
             
             # Parse section content
             elif current_section and line.startswith('-'):
@@ -77,27 +153,33 @@ class FCMParser:
                 
                 if current_section == 'parameters':
                     # Parse parameter: name: type (optional)
-                    match = re.match(r'(\w+):\s*(.+?)(\s*\(optional\))?$', content)
-                    if match:
+                    name, sep, param_type = content.partition(':')
+                    param_type = param_type.strip()
+                    optional = param_type.endswith(_OPTIONAL_SUFFIX)
+                    if optional:
+                        param_type = param_type[:-len(_OPTIONAL_SUFFIX)].rstrip()
+                    
+                    if sep and param_type and name.replace('_', '').isalnum():
                         param = {
-                            'name': match.group(1),
-                            'type': match.group(2).strip(),
-                            'required': match.group(3) is None
+                            'name': name,
+                            'type': param_type,
+                            'required': not optional
                         }
                         # Handle choice parameters (e.g., create|delete|list)
                         if '|' in param['type']:
                             param['choices'] = param['type'].split('|')
                             param['type'] = 'choice'
                         data['parameters'].append(param)
+                        data['parameters_by_name'].setdefault(param['name'], param)
                 
                 elif current_section == 'outputs':
                     data['outputs'].append(content)
                 
                 elif current_section == 'dependencies':
                     # Parse dependency with optional flag
-                    if '(optional)' in content:
+                    if _OPTIONAL_SUFFIX in content:
                         data['dependencies'].append({
-                            'name': content.replace('(optional)', '').strip(),
+                            'name': content.replace(_OPTIONAL_SUFFIX, '').strip(),
                             'optional': True
                         })
                     else:
@@ -110,10 +192,9 @@ class FCMParser:
                     data['patterns'].append(content)
             
             # Parse interface section
-            elif current_section == 'interface' and ':' in line:
-                key, value = line.split(':', 1)
-                key = key.strip()
-                value = value.strip()
+            elif current_section == 'interface' and sep:
+                key = head.strip()
+                value = rest.strip()
                 
                 # Parse requirements list
                 if key == 'requirements' and value.startswith('['):
@@ -126,39 +207,89 @@ class FCMParser:
         return data
     
     def get_checksum(self) -> str:
-        """Calculate SHA256 checksum of FCM content"""
-        return hashlib.sha256(self.content.encode()).hexdigest()
+        """Return SHA256 checksum of FCM content"""
+        return self._checksum
 
 
 class GitLabBridgeGenerator:
     """Generate GitLab CI/CD templates from FCM definitions"""
     
     def __init__(self, fcm_base_paths: list = None, 
-                 output_base_path: str = ".gitlab-ci"):
+                 output_base_path: str = ".gitlab-ci",
+                 max_workers: Optional[int] = None):
         if fcm_base_paths is None:
             fcm_base_paths = ["github.toolkit/axioms", "axioms"]
         self.fcm_base_paths = [Path(p) for p in fcm_base_paths]
         self.output_base_path = Path(output_base_path)
+        self.max_workers = max_workers
         self.generated_files = []
+        self._timestamp = None
+        self._known_dirs = set()
+    
+    @property
+    def _run_timestamp(self) -> str:
+        """Generation time, taken when the first file of a run is written"""
+        if self._timestamp is None:
+            self._timestamp = _utc_timestamp()
+        return self._timestamp
         
     def generate_all(self):
         """Generate GitLab templates for all FCM files"""
+        # One timestamp for every file produced by this run
+        self._timestamp = None
+        
         # Ensure output directories exist
-        (self.output_base_path / "jobs").mkdir(parents=True, exist_ok=True)
-        (self.output_base_path / "templates").mkdir(parents=True, exist_ok=True)
+        for subdir in ("jobs", "templates"):
+            directory = self.output_base_path / subdir
+            directory.mkdir(parents=True, exist_ok=True)
+            self._known_dirs.add(directory)
+        self._known_dirs.add(self.output_base_path)
         
         # Find all FCM files from all base paths
         fcm_files = []
         for base_path in self.fcm_base_paths:
             if base_path.exists():
-                fcm_files.extend(list(base_path.rglob("*.fcm")))
+                fcm_files.extend(Path(p) for p in _iter_fcm_files(str(base_path)))
         
         print(f"Found {len(fcm_files)} FCM files to process")
         
-        for fcm_file in fcm_files:
+        # Job files are independent per FCM and can be built in parallel,
+        # unless two FCMs map to the same job file and would race for it
+        parallel = self.max_workers != 1 and len(fcm_files) >= _PARALLEL_MIN_FILES
+        if parallel:
+            job_owners = {}
+            for fcm_file in fcm_files:
+                model = _read_model(fcm_file)
+                if model is None:
+                    continue
+                job_path = self._job_path(model)
+                if job_path in job_owners:
+                    print(f"WARNING: {job_owners[job_path]} and {fcm_file} both generate "
+                          f"{job_path}; generating jobs serially")
+                    parallel = False
+                    break
+                job_owners[job_path] = fcm_file
+        
+        if parallel:
+            # Workers get a copy of self, so fix the run's timestamp first
+            self._timestamp = _utc_timestamp()
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+                results = list(executor.map(self._generate_job_isolated,
+                                            fcm_files, chunksize=4))
+        else:
+            results = [self._generate_job_isolated(f) for f in fcm_files]
+        
+        # Domain templates are shared between FCMs, so write them in order
+        for fcm_file, (parser, generated, log) in zip(fcm_files, results):
             print(f"\nProcessing: {fcm_file}")
+            sys.stdout.write(log)
+            self.generated_files.extend(generated)
+            if parser is None:
+                continue
+            
             try:
-                self.generate_from_fcm(fcm_file)
+                self._generate_domain_template(parser, fcm_file)
             except Exception as e:
                 print(f"  ERROR: {e}")
                 continue
@@ -170,42 +301,96 @@ class GitLabBridgeGenerator:
     
     def generate_from_fcm(self, fcm_path: Path):
         """Generate GitLab CI templates from a single FCM file"""
+        parser = self._generate_job(fcm_path)
+        self._generate_domain_template(parser, fcm_path)
+    
+    def _generate_job_isolated(self, fcm_path: Path) -> Tuple[Optional[FCMParser], List[Path], str]:
+        """Generate the job for one FCM, returning parser, new files and log
+        
+        Safe to run in a worker process: nothing is printed directly and
+        the files written are handed back instead of kept on self.
+        """
+        start = len(self.generated_files)
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            try:
+                parser = self._generate_job(fcm_path)
+            except Exception as e:
+                print(f"  ERROR: {e}")
+                parser = None
+        
+        generated = self.generated_files[start:]
+        del self.generated_files[start:]
+        return parser, generated, log.getvalue()
+    
+    def _generate_job(self, fcm_path: Path) -> FCMParser:
+        """Parse an FCM file and generate its job definition"""
         parser = FCMParser(str(fcm_path))
         fcm_data = parser.data
         
-        # Determine output paths based on FCM model
-        model_parts = fcm_data['model'].split('.')
-        domain = model_parts[0]
-        capability = model_parts[1] if len(model_parts) > 1 else 'unknown'
-        
-        # Generate job definition
-        job_path = self.output_base_path / "jobs" / f"{capability}.yml"
-        self._generate_job_definition(fcm_data, parser, fcm_path, job_path)
+        # Generate job definition unless it was already built from this FCM
+        job_path = self._job_path(fcm_data['model'])
+        if self._is_up_to_date(parser, job_path):
+            print(f"  → Job up to date: {job_path}")
+        else:
+            self._generate_job_definition(fcm_data, parser, fcm_path, job_path)
         
-        # Generate template if it has parameters
+        return parser
+    
+    def _job_path(self, model: str) -> Path:
+        """Determine the job output path based on an FCM model"""
+        model_parts = model.split('.')
+        capability = model_parts[1] if len(model_parts) > 1 else 'unknown'
+        return self.output_base_path / "jobs" / f"{capability}.yml"
+    
+    def _generate_domain_template(self, parser: FCMParser, fcm_path: Path):
+        """Generate the domain template for an FCM if it has parameters"""
+        fcm_data = parser.data
         if fcm_data['parameters']:
+            domain = fcm_data['model'].split('.')[0]
             template_path = self.output_base_path / "templates" / f"{domain}-operations.yml"
             self._generate_template(fcm_data, parser, fcm_path, template_path, domain)
     
+    def _is_up_to_date(self, parser: FCMParser, job_path: Path) -> bool:
+        """Check if job_path was generated from the same FCM content"""
+        sync_path = job_path.with_suffix('.bridge-sync')
+        if not (job_path.exists() and sync_path.exists()):
+            return False
+        
+        import json
+        try:
+            with open(sync_path, 'r') as f:
+                bridge_sync = json.load(f)
+        except (OSError, ValueError):
+            return False
+        
+        return (bridge_sync.get('checksum') == parser.get_checksum() and
+                bridge_sync.get('generator_version') == GENERATOR_VERSION)
+    
     def _generate_job_definition(self, fcm_data: Dict, parser: FCMParser, 
                                 fcm_path: Path, output_path: Path):
         """Generate GitLab job definition from FCM"""
         
+        # Values shared by the job header and the bridge sync metadata
+        source_fcm = str(fcm_path.relative_to('.'))
+        generated_at = self._run_timestamp
+        
         # Build job definition
         job_name = fcm_data['model'].replace('.', '-')
         
+        header = [
+            '# GENERATED FILE - DO NOT EDIT',
+            f'# Source: {source_fcm}',
+            f'# Model: {fcm_data["model"]} v{fcm_data["version"]}',
+            f'# Generated: {generated_at}',
+            '',
+            '# To modify this job:',
+            '# 1. Edit the source FCM',
+            '# 2. Run: python .gitlab-bridge/generator.py',
+            '# 3. Commit both FCM and generated files'
+        ]
+        
         job_def = {
-            '# GENERATED FILE - DO NOT EDIT': None,
-            f'# Source: {fcm_path.relative_to(".")}': None,
-            f'# Model: {fcm_data["model"]} v{fcm_data["version"]}': None,
-            f'# Generated: {datetime.utcnow().isoformat()}Z': None,
-            '': None,
-            '# To modify this job:': None,
-            '# 1. Edit the source FCM': None,
-            '# 2. Run: python .gitlab-bridge/generator.py': None,
-            '# 3. Commit both FCM and generated files': None,
-            '': None,
-            
             # Include the appropriate template
             'include': [
                 {'local': f'.gitlab-ci/templates/{fcm_data["domain"]}-operations.yml'}
@@ -215,10 +400,9 @@ class GitLabBridgeGenerator:
         }
         
         # For each action/operation parameter value, create a job
-        action_param = next((p for p in fcm_data['parameters'] 
-                           if p['name'] == 'action' and p['type'] == 'choice'), None)
+        action_param = fcm_data['parameters_by_name'].get('action')
         
-        if action_param:
+        if action_param and action_param['type'] == 'choice':
             for action in action_param['choices']:
                 job_key = f"{job_name}-{action}"
                 job_def[job_key] = {
@@ -245,21 +429,20 @@ class GitLabBridgeGenerator:
         
         # Add bridge sync metadata
         bridge_sync = {
-            'source_fcm': str(fcm_path.relative_to('.')),
+            'source_fcm': source_fcm,
             'model': fcm_data['model'],
             'version': fcm_data['version'],
-            'generated_at': datetime.utcnow().isoformat() + 'Z',
-            'generator_version': 'gitlab-bridge-1.0.0',
+            'generated_at': generated_at,
+            'generator_version': GENERATOR_VERSION,
             'checksum': parser.get_checksum()
         }
         
         # Write job definition
-        self._write_yaml(job_def, output_path)
+        self._write_yaml(header, job_def, output_path)
         
         # Write bridge sync file
         sync_path = output_path.with_suffix('.bridge-sync')
-        with open(sync_path, 'w') as f:
-            json.dump(bridge_sync, f, indent=2)
+        self._write_json(bridge_sync, sync_path)
         
         self.generated_files.extend([output_path, sync_path])
         print(f"  ✓ Generated job: {output_path}")
@@ -273,12 +456,14 @@ class GitLabBridgeGenerator:
             print(f"  → Template already exists: {output_path}")
             return
         
+        header = [
+            '# GENERATED FILE - DO NOT EDIT',
+            f'# Domain: {domain}',
+            f'# Generated: {self._run_timestamp}',
+            ''
+        ]
+        
         template = {
-            '# GENERATED FILE - DO NOT EDIT': None,
-            f'# Domain: {domain}': None,
-            f'# Generated: {datetime.utcnow().isoformat()}Z': None,
-            '': None,
-            
             # Base template for operations (shell runner)
             f'.{domain}_operation_base': {
                 'stage': 'build',  # Use standard GitLab stage
@@ -372,6 +557,14 @@ class GitLabBridgeGenerator:
         else:
             operation_template['script'] = [f'python3 scripts/{domain}_operations.py']
         
+        # Share the version calculator's commit count cache across jobs
+        if domain == 'version':
+            operation_template['cache'] = {
+                'key': 'version-calculator',
+                'paths': ['.cache/version/'],
+                'unprotect': True
+            }
+        
         # Add artifacts for outputs
         if fcm_data['outputs']:
             operation_template['artifacts'] = {
@@ -384,7 +577,7 @@ class GitLabBridgeGenerator:
         template[f'.{domain}_operation'] = operation_template
         
         # Write template
-        self._write_yaml(template, output_path)
+        self._write_yaml(header, template, output_path)
         self.generated_files.append(output_path)
         print(f"  ✓ Generated template: {output_path}")
     
@@ -392,53 +585,61 @@ class GitLabBridgeGenerator:
         """Generate master include file for all templates"""
         include_path = self.output_base_path / "includes.yml"
         
-        includes = {
-            '# GENERATED FILE - DO NOT EDIT': None,
-            '# Master include file for all GitLab CI templates': None,
-            f'# Generated: {datetime.utcnow().isoformat()}Z': None,
-            '': None,
-            
-            'include': []
-        }
-        
-        # Add all template files
-        for template_file in sorted((self.output_base_path / "templates").glob("*.yml")):
-            includes['include'].append({
-                'local': f'.gitlab-ci/templates/{template_file.name}'
-            })
-        
-        # Add all job files
-        for job_file in sorted((self.output_base_path / "jobs").glob("*.yml")):
-            includes['include'].append({
-                'local': f'.gitlab-ci/jobs/{job_file.name}'
-            })
-        
-        self._write_yaml(includes, include_path)
+        header = [
+            '# GENERATED FILE - DO NOT EDIT',
+            '# Master include file for all GitLab CI templates',
+            f'# Generated: {self._run_timestamp}',
+            ''
+        ]
+        
+        includes = {'include': []}
+        
+        # Add all template files, then all job files. The directories are
+        # listed rather than taken from generated_files so that unchanged and
+        # hand-written files stay included.
+        for subdir in ("templates", "jobs"):
+            for name in _list_yml_files(self.output_base_path / subdir):
+                includes['include'].append({
+                    'local': f'.gitlab-ci/{subdir}/{name}'
+                })
+        
+        self._write_yaml(header, includes, include_path)
         self.generated_files.append(include_path)
         print(f"\n✓ Generated master include: {include_path}")
     
-    def _write_yaml(self, data: Dict, output_path: Path):
-        """Write YAML file with proper formatting"""
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        
-        with open(output_path, 'w') as f:
-            # Write comments and empty values manually
-            for key, value in data.items():
-                if key.startswith('#'):
-                    f.write(f"{key}\n")
-                elif key == '':
-                    f.write('\n')
-                elif value is None:
-                    continue
-                else:
-                    # Write the rest as YAML
-                    yaml.dump({key: value}, f, default_flow_style=False, sort_keys=False)
+    def _write_json(self, data: Dict, output_path: Path):
+        """Write JSON with two-space indentation"""
+        orjson = _orjson()
+        if orjson is not None:
+            with open(output_path, 'wb') as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        else:
+            import json
+            with open(output_path, 'w') as f:
+                json.dump(data, f, indent=2)
+    
+    def _write_yaml(self, header: List[str], body: Dict, output_path: Path):
+        """Write header comment lines followed by body as YAML"""
+        directory = output_path.parent
+        if directory not in self._known_dirs:
+            directory.mkdir(parents=True, exist_ok=True)
+            self._known_dirs.add(directory)
+        
+        buf = io.StringIO()
+        for line in header:
+            buf.write(f"{line}\n")
+        
+        # Write the body as YAML in a single pass
+        if body:
+            import yaml
+            yaml.dump(body, buf, Dumper=_yaml_dumper(),
+                      default_flow_style=False, sort_keys=False)
+        
+        output_path.write_text(buf.getvalue())
 
 
 def main():
     """Main entry point"""
-    import sys
-    
     # Check if github.toolkit exists
     if not Path("github.toolkit/axioms").exists():
         print("ERROR: github.toolkit/axioms not found!")
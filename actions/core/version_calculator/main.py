@@ -8,42 +8,186 @@ import os
 import subprocess
 import re
 import sys
+import fnmatch
+from functools import lru_cache
+
+# Characters accepted in user-supplied tag globs and version prefixes
+_TAG_PATTERN_RE = re.compile(r'^[A-Za-z0-9._*?+\-\[\]/]+$')
+_VERSION_PREFIX_RE = re.compile(r'^[A-Za-z0-9._\-/]*$')
+
+# Accepted COUNT_MODE values
+_COUNT_MODES = frozenset({'first-parent', 'all'})
+
+@lru_cache(maxsize=8)
+def _validate_re(prefix):
+    """Compiled pattern for a complete version string with prefix."""
+    return re.compile(rf'^{re.escape(prefix)}\d+\.\d+\.\d+$')
+
+@lru_cache(maxsize=8)
+def _parse_re(prefix):
+    """Compiled pattern capturing X.Y.Z at the start of a tag with prefix."""
+    return re.compile(rf'^{re.escape(prefix)}(\d+)\.(\d+)\.(\d+)')
+
+def get_input(name, default):
+    """Read an input, preferring GitHub Actions' INPUT_<name> over <name>."""
+    env = os.environ
+    return env.get(f'INPUT_{name}') or env.get(name, default)
+
+# Workspaces already known to be trusted by git in this process
+_TRUSTED_WORKSPACES = set()
+
+def _workspace_is_trusted(workspace):
+    """Check without running git whether git already trusts workspace."""
+    # git only refuses repositories owned by another user
+    try:
+        if os.stat(workspace).st_uid == os.geteuid():
+            return True
+    except (OSError, AttributeError):
+        pass
+    
+    # Look for an existing safe.directory entry in the global config
+    try:
+        with open(os.path.expanduser('~/.gitconfig')) as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return False
+    
+    section = None
+    for line in lines:
+        line = line.strip()
+        if line.startswith('['):
+            section = line.strip('[]').strip().lower()
+        elif section == 'safe':
+            key, sep, value = line.partition('=')
+            if sep and key.strip() == 'directory' and value.strip().strip('"') in ('*', workspace):
+                return True
+    return False
 
 def setup_git():
     """Configure git to trust the workspace."""
+    # For GitLab CI environment
+    workspace = os.environ.get('CI_PROJECT_DIR', '/github/workspace')
+    if workspace in _TRUSTED_WORKSPACES or _workspace_is_trusted(workspace):
+        _TRUSTED_WORKSPACES.add(workspace)
+        return
+    
     try:
-        # For GitLab CI environment
-        workspace = os.environ.get('CI_PROJECT_DIR', '/github/workspace')
         subprocess.check_output(['git', 'config', '--global', '--add', 'safe.directory', workspace], text=True)
+        _TRUSTED_WORKSPACES.add(workspace)
     except subprocess.CalledProcessError as e:
         print(f"Warning: Error configuring git: {e}")
         # Continue - GitLab CI should already have git configured
 
+@lru_cache(maxsize=None)
+def _pygit2():
+    """Return the pygit2 module when installed, else None."""
+    try:
+        import pygit2
+    except ImportError:
+        return None
+    return pygit2
+
+def _open_repository():
+    """Open the repository in the working directory with pygit2, if available."""
+    pygit2 = _pygit2()
+    if pygit2 is None:
+        return None
+    try:
+        return pygit2.Repository(os.getcwd())
+    except pygit2.GitError:
+        return None
+
+def _tag_ref_pattern(tag_pattern):
+    """Full ref glob for tag_pattern, which may already be a refs/ pattern."""
+    if tag_pattern.startswith('refs/'):
+        return tag_pattern
+    return f'refs/tags/{tag_pattern}'
+
+def _version_key(name):
+    """Sort key approximating git's version sort: digit runs compare as numbers."""
+    return [int(part) if i % 2 else part for i, part in enumerate(re.split(r'(\d+)', name))]
+
+def _latest_tag_and_count_pygit2(repo, tag_pattern, count_mode):
+    """In-process equivalent of the git subprocess tag lookup and count."""
+    pygit2 = _pygit2()
+    ref_pattern = _tag_ref_pattern(tag_pattern)
+    tags = [ref[10:] for ref in repo.references
+            if ref.startswith('refs/tags/') and fnmatch.fnmatchcase(ref, ref_pattern)]
+    if not tags:
+        return None, 0
+    latest_tag = max(tags, key=_version_key)
+    
+    head = repo.head.target
+    base = repo.revparse_single(f'refs/tags/{latest_tag}').peel(pygit2.Commit).id
+    if count_mode == 'all':
+        return latest_tag, repo.ahead_behind(head, base)[0]
+    
+    walker = repo.walk(head)
+    walker.simplify_first_parent()
+    walker.hide(base)
+    return latest_tag, sum(1 for _ in walker)
+
 def get_latest_tag(tag_pattern='v*'):
     """Retrieve the latest version tag matching pattern."""
+    ref_pattern = _tag_ref_pattern(tag_pattern)
     try:
-        # Get all tags matching pattern
-        output = subprocess.check_output(['git', 'tag', '-l', tag_pattern, '--sort=-v:refname'], text=True).strip()
-        if output:
-            return output.splitlines()[0]
-        return None
-    except subprocess.CalledProcessError as e:
-        print(f"Error fetching tags: {e}")
-        sys.exit(1)
+        # Let git sort and return only the newest matching tag, scanning
+        # only the refs under the pattern's own prefix
+        output = subprocess.check_output(
+            ['git', 'for-each-ref', '--sort=-v:refname', '--count=1',
+             '--format=%(refname:lstrip=2)', ref_pattern],
+            text=True).strip()
+    except subprocess.CalledProcessError:
+        # Older git without version sorting in for-each-ref
+        try:
+            output = subprocess.check_output(
+                ['git', 'tag', '-l', ref_pattern[len('refs/tags/'):], '--sort=-v:refname'],
+                text=True).strip()
+        except subprocess.CalledProcessError as e:
+            print(f"Error fetching tags: {e}")
+            sys.exit(1)
+    
+    if output:
+        return output.splitlines()[0]
+    return None
+
+def get_commit_count_since_tag(tag, count_mode='first-parent'):
+    """Count commits since the specified tag.
 
-def get_commit_count_since_tag(tag):
-    """Count commits since the specified tag."""
+    With count_mode 'first-parent' only mainline commits are counted;
+    'all' also counts every commit brought in by merges.
+    """
+    args = ['git', 'rev-list', f'{tag}..HEAD', '--count']
+    if count_mode != 'all':
+        args.append('--first-parent')
     try:
-        output = subprocess.check_output(['git', 'rev-list', f'{tag}..HEAD', '--count'], text=True).strip()
+        output = subprocess.check_output(args, text=True).strip()
         return int(output)
     except subprocess.CalledProcessError as e:
         print(f"Error counting commits: {e}")
         sys.exit(1)
 
+def get_latest_tag_and_count(tag_pattern='v*', count_mode='first-parent'):
+    """Return the latest tag matching pattern and the commits since it.
+
+    Returns (None, 0) without counting when no tag matches. Uses pygit2
+    in-process when it is installed, falling back to git subprocesses.
+    """
+    repo = _open_repository()
+    if repo is not None:
+        try:
+            return _latest_tag_and_count_pygit2(repo, tag_pattern, count_mode)
+        except (_pygit2().GitError, KeyError, ValueError) as e:
+            print(f"Warning: pygit2 lookup failed, using git: {e}")
+    
+    latest_tag = get_latest_tag(tag_pattern)
+    if not latest_tag:
+        return None, 0
+    return latest_tag, get_commit_count_since_tag(latest_tag, count_mode)
+
 def validate_version_format(version, prefix):
     """Validate version string format."""
-    pattern = f'^{prefix}\\d+\\.\\d+\\.\\d+$'
-    if not re.match(pattern, version):
+    if not _validate_re(prefix).match(version):
         print(f"Invalid version format: {version}")
         sys.exit(1)
     return True
@@ -54,49 +198,59 @@ def write_outputs(current_version, next_version, commit_count):
     github_output = os.environ.get('GITHUB_OUTPUT')
     if github_output:
         with open(github_output, 'a') as f:
-            f.write(f"current_version={current_version}\n")
-            f.write(f"next_version={next_version}\n")
-            f.write(f"commit_count={commit_count}\n")
+            f.write(f"current_version={current_version}\n"
+                    f"next_version={next_version}\n"
+                    f"commit_count={commit_count}\n")
     
     # GitLab CI output
     gitlab_output = 'operation_outputs.env'
     with open(gitlab_output, 'w') as f:
-        f.write(f"CURRENT_VERSION={current_version}\n")
-        f.write(f"NEXT_VERSION={next_version}\n")
-        f.write(f"COMMIT_COUNT={commit_count}\n")
+        f.write(f"CURRENT_VERSION={current_version}\n"
+                f"NEXT_VERSION={next_version}\n"
+                f"COMMIT_COUNT={commit_count}\n")
 
 def main():
     """Main function."""
     print("🏷️ Version Calculator")
     
     # Get inputs with defaults - support both GitHub Actions and GitLab CI
-    default_version = os.environ.get('INPUT_DEFAULT_VERSION') or os.environ.get('DEFAULT_VERSION', 'v0.1.0')
-    version_prefix = os.environ.get('INPUT_VERSION_PREFIX') or os.environ.get('VERSION_PREFIX', 'v')
-    tag_pattern = os.environ.get('INPUT_TAG_PATTERN') or os.environ.get('TAG_PATTERN', 'v*')
+    default_version = get_input('DEFAULT_VERSION', 'v0.1.0')
+    version_prefix = get_input('VERSION_PREFIX', 'v')
+    tag_pattern = get_input('TAG_PATTERN', 'v*')
+    count_mode = get_input('COUNT_MODE', 'first-parent')
 
     # Validate inputs
+    if not _TAG_PATTERN_RE.match(tag_pattern):
+        print(f"Invalid tag pattern: {tag_pattern!r}")
+        sys.exit(2)
+    if not _VERSION_PREFIX_RE.match(version_prefix):
+        print(f"Invalid version prefix: {version_prefix!r}")
+        sys.exit(2)
+    if count_mode not in _COUNT_MODES:
+        print(f"Invalid count mode: {count_mode!r}")
+        sys.exit(2)
     validate_version_format(default_version, version_prefix)
 
     # Setup git
     setup_git()
 
-    # Get latest tag
-    latest_tag = get_latest_tag(tag_pattern)
+    # Get latest tag and commit count since it
+    latest_tag, commit_count = get_latest_tag_and_count(tag_pattern, count_mode)
     current_version = latest_tag if latest_tag else default_version
     
-    # Calculate commit count
-    commit_count = 0
-    if latest_tag:
-        commit_count = get_commit_count_since_tag(latest_tag)
-    
     # Calculate next version
     if latest_tag and commit_count > 0:
-        pattern = f'{version_prefix}(\\d+)\\.(\\d+)\\.(\\d+)'
-        match = re.match(pattern, latest_tag)
-        if not match:
-            print(f"Invalid version format: {latest_tag}")
-            sys.exit(1)
-        major, minor, patch = map(int, match.groups())
+        parts = latest_tag[len(version_prefix):].split('.')
+        if (latest_tag.startswith(version_prefix) and len(parts) == 3
+                and all(part.isdecimal() for part in parts)):
+            major, minor, patch = int(parts[0]), int(parts[1]), int(parts[2])
+        else:
+            # Suffixed tags such as v1.2.3-rc1 still bump their X.Y.Z
+            match = _parse_re(version_prefix).match(latest_tag)
+            if not match:
+                print(f"Invalid version format: {latest_tag}")
+                sys.exit(1)
+            major, minor, patch = map(int, match.groups())
         next_version = f"{version_prefix}{major}.{minor}.{patch + commit_count}"
     else:
         next_version = current_version
@@ -1,35 +1,53 @@
 import pytest
-import os
-import tempfile
 import subprocess
-from pathlib import Path
+from functools import partial
+
+
+# Commit identity for test repositories, passed through the environment so
+# no per-repository `git config` calls are needed
+GIT_IDENTITY = {
+    'GIT_AUTHOR_NAME': 'Test User',
+    'GIT_AUTHOR_EMAIL': 'test@example.com',
+    'GIT_COMMITTER_NAME': 'Test User',
+    'GIT_COMMITTER_EMAIL': 'test@example.com'
+}
+
+
+@pytest.fixture(scope='session')
+def template_git_repo(tmp_path_factory):
+    """Create a git repository with an initial commit once per session"""
+    repo_path = tmp_path_factory.mktemp('template_repo')
+    
+    subprocess.run(['git', 'init'], cwd=repo_path, check=True, capture_output=True)
+    (repo_path / 'test.txt').write_text('initial commit')
+    subprocess.run(['git', 'add', 'test.txt'], cwd=repo_path, check=True, capture_output=True)
+    subprocess.run(['git', '-c', 'user.email=test@example.com', '-c', 'user.name=Test User',
+                    'commit', '-m', 'Initial commit'], cwd=repo_path, check=True, capture_output=True)
+    
+    return repo_path
 
 
 @pytest.fixture
-def temp_git_repo():
-    """Create a temporary git repository for testing"""
-    with tempfile.TemporaryDirectory() as tmpdir:
-        repo_path = Path(tmpdir)
-        
-        # Initialize git repo
-        subprocess.run(['git', 'init'], cwd=repo_path, check=True, capture_output=True)
-        subprocess.run(['git', 'config', 'user.email', 'test@example.com'], cwd=repo_path, check=True)
-        subprocess.run(['git', 'config', 'user.name', 'Test User'], cwd=repo_path, check=True)
-        
-        # Create initial commit
-        test_file = repo_path / 'test.txt'
-        test_file.write_text('initial commit')
-        subprocess.run(['git', 'add', 'test.txt'], cwd=repo_path, check=True)
-        subprocess.run(['git', 'commit', '-m', 'Initial commit'], cwd=repo_path, check=True)
-        
-        # Change to repo directory for tests
-        original_cwd = os.getcwd()
-        os.chdir(repo_path)
-        
-        yield repo_path
-        
-        # Restore original directory
-        os.chdir(original_cwd)
+def temp_git_repo(template_git_repo, tmp_path, monkeypatch):
+    """Create a temporary git repository for testing
+    
+    Yields the repository path and a ``subprocess.run`` bound to it that
+    checks the return code and captures text output.
+    """
+    repo_path = tmp_path / 'repo'
+    
+    # Cheap per-test copy that shares the template's objects
+    subprocess.run(['git', 'clone', '--local', '--shared', str(template_git_repo), str(repo_path)],
+                   check=True, capture_output=True)
+    
+    for key, value in GIT_IDENTITY.items():
+        monkeypatch.setenv(key, value)
+    
+    # Change to repo directory for tests (restored by monkeypatch)
+    monkeypatch.chdir(repo_path)
+    
+    run = partial(subprocess.run, cwd=repo_path, check=True, capture_output=True, text=True)
+    yield repo_path, run
 
 
 @pytest.fixture
@@ -46,7 +64,7 @@ def clean_env(monkeypatch):
     """Clean environment of GitHub/GitLab specific variables"""
     env_vars = ['GITHUB_OUTPUT', 'CI_PROJECT_DIR', 'INPUT_DEFAULT_VERSION', 
                 'INPUT_VERSION_PREFIX', 'INPUT_TAG_PATTERN', 'DEFAULT_VERSION',
-                'VERSION_PREFIX', 'TAG_PATTERN']
+                'VERSION_PREFIX', 'TAG_PATTERN', 'INPUT_COUNT_MODE', 'COUNT_MODE']
     
     for var in env_vars:
         monkeypatch.delenv(var, raising=False)
\ No newline at end of file
@@ -15,10 +15,12 @@ class TestVersionCalculatorIntegration:
 
     def test_version_calculation_no_tags(self, temp_git_repo, clean_env, mock_env):
         """Test version calculation when no tags exist"""
+        repo_path, run = temp_git_repo
+        
         mock_env(DEFAULT_VERSION='v0.1.0')
         
         # Create output file
-        output_file = temp_git_repo / 'operation_outputs.env'
+        output_file = repo_path / 'operation_outputs.env'
         
         main.main()
         
@@ -31,15 +33,17 @@ class TestVersionCalculatorIntegration:
 
     def test_version_calculation_with_tag_no_commits(self, temp_git_repo, clean_env, mock_env):
         """Test version calculation with existing tag and no new commits"""
+        repo_path, run = temp_git_repo
+        
         # Create a tag
-        subprocess.run(['git', 'tag', 'v1.0.0'], cwd=temp_git_repo, check=True)
+        run(['git', 'tag', 'v1.0.0'])
         
         mock_env(VERSION_PREFIX='v', TAG_PATTERN='v*')
         
         main.main()
         
         # Check outputs
-        output_file = temp_git_repo / 'operation_outputs.env'
+        output_file = repo_path / 'operation_outputs.env'
         content = output_file.read_text()
         assert 'CURRENT_VERSION=v1.0.0' in content
         assert 'NEXT_VERSION=v1.0.0' in content
@@ -47,22 +51,24 @@ class TestVersionCalculatorIntegration:
 
     def test_version_calculation_with_tag_and_commits(self, temp_git_repo, clean_env, mock_env):
         """Test version calculation with existing tag and new commits"""
+        repo_path, run = temp_git_repo
+        
         # Create a tag
-        subprocess.run(['git', 'tag', 'v1.0.0'], cwd=temp_git_repo, check=True)
+        run(['git', 'tag', 'v1.0.0'])
         
         # Add more commits
         for i in range(3):
-            test_file = temp_git_repo / f'test{i}.txt'
+            test_file = repo_path / f'test{i}.txt'
             test_file.write_text(f'commit {i}')
-            subprocess.run(['git', 'add', f'test{i}.txt'], cwd=temp_git_repo, check=True)
-            subprocess.run(['git', 'commit', '-m', f'Commit {i}'], cwd=temp_git_repo, check=True)
+            run(['git', 'add', f'test{i}.txt'])
+            run(['git', 'commit', '-m', f'Commit {i}'])
         
         mock_env(VERSION_PREFIX='v', TAG_PATTERN='v*')
         
         main.main()
         
         # Check outputs
-        output_file = temp_git_repo / 'operation_outputs.env'
+        output_file = repo_path / 'operation_outputs.env'
         content = output_file.read_text()
         assert 'CURRENT_VERSION=v1.0.0' in content
         assert 'NEXT_VERSION=v1.0.3' in content  # patch incremented by commit count
@@ -70,52 +76,86 @@ class TestVersionCalculatorIntegration:
 
     def test_version_calculation_multiple_tags(self, temp_git_repo, clean_env, mock_env):
         """Test version calculation with multiple tags"""
+        repo_path, run = temp_git_repo
+        
         # Create multiple tags (git sorts them)
-        subprocess.run(['git', 'tag', 'v1.0.0'], cwd=temp_git_repo, check=True)
+        run(['git', 'tag', 'v1.0.0'])
         
         # Add commit and new tag
-        test_file = temp_git_repo / 'test2.txt'
+        test_file = repo_path / 'test2.txt'
         test_file.write_text('another commit')
-        subprocess.run(['git', 'add', 'test2.txt'], cwd=temp_git_repo, check=True)
-        subprocess.run(['git', 'commit', '-m', 'Another commit'], cwd=temp_git_repo, check=True)
-        subprocess.run(['git', 'tag', 'v1.1.0'], cwd=temp_git_repo, check=True)
+        run(['git', 'add', 'test2.txt'])
+        run(['git', 'commit', '-m', 'Another commit'])
+        run(['git', 'tag', 'v1.1.0'])
         
         # Add more commits after latest tag
         for i in range(2):
-            test_file = temp_git_repo / f'test_after_{i}.txt'
+            test_file = repo_path / f'test_after_{i}.txt'
             test_file.write_text(f'commit after tag {i}')
-            subprocess.run(['git', 'add', f'test_after_{i}.txt'], cwd=temp_git_repo, check=True)
-            subprocess.run(['git', 'commit', '-m', f'After tag {i}'], cwd=temp_git_repo, check=True)
+            run(['git', 'add', f'test_after_{i}.txt'])
+            run(['git', 'commit', '-m', f'After tag {i}'])
         
         mock_env(VERSION_PREFIX='v', TAG_PATTERN='v*')
         
         main.main()
         
         # Check outputs - should use latest tag (v1.1.0)
-        output_file = temp_git_repo / 'operation_outputs.env'
+        output_file = repo_path / 'operation_outputs.env'
         content = output_file.read_text()
         assert 'CURRENT_VERSION=v1.1.0' in content
         assert 'NEXT_VERSION=v1.1.2' in content  # 2 commits since v1.1.0
         assert 'COMMIT_COUNT=2' in content
 
+    def test_merge_commits_counted_by_count_mode(self, temp_git_repo, clean_env, mock_env):
+        """Test merged branch commits only count with COUNT_MODE=all"""
+        repo_path, run = temp_git_repo
+        
+        run(['git', 'tag', 'v1.0.0'])
+        main_branch = run(['git', 'rev-parse', '--abbrev-ref', 'HEAD']).stdout.strip()
+        
+        # Two commits on a feature branch, merged back with a merge commit
+        run(['git', 'checkout', '-b', 'feature'])
+        for i in range(2):
+            (repo_path / f'feature{i}.txt').write_text(f'feature {i}')
+            run(['git', 'add', f'feature{i}.txt'])
+            run(['git', 'commit', '-m', f'Feature {i}'])
+        run(['git', 'checkout', main_branch])
+        run(['git', 'merge', '--no-ff', '-m', 'Merge feature', 'feature'])
+        
+        mock_env(VERSION_PREFIX='v', TAG_PATTERN='v*')
+        main.main()
+        content = (repo_path / 'operation_outputs.env').read_text()
+        assert 'NEXT_VERSION=v1.0.1' in content  # only the merge commit
+        assert 'COMMIT_COUNT=1' in content
+        
+        mock_env(COUNT_MODE='all')
+        main.main()
+        content = (repo_path / 'operation_outputs.env').read_text()
+        assert 'NEXT_VERSION=v1.0.3' in content
+        assert 'COMMIT_COUNT=3' in content
+
     def test_custom_tag_pattern(self, temp_git_repo, clean_env, mock_env):
         """Test version calculation with custom tag pattern"""
+        repo_path, run = temp_git_repo
+        
         # Create tags with different patterns
-        subprocess.run(['git', 'tag', 'v1.0.0'], cwd=temp_git_repo, check=True)
-        subprocess.run(['git', 'tag', 'release-2.0.0'], cwd=temp_git_repo, check=True)
+        run(['git', 'tag', 'v1.0.0'])
+        run(['git', 'tag', 'release-2.0.0'])
         
         mock_env(VERSION_PREFIX='release-', TAG_PATTERN='release-*')
         
         main.main()
         
         # Should only consider release-* tags
-        output_file = temp_git_repo / 'operation_outputs.env'
+        output_file = repo_path / 'operation_outputs.env'
         content = output_file.read_text()
         assert 'CURRENT_VERSION=release-2.0.0' in content
 
     def test_github_actions_compatibility(self, temp_git_repo, clean_env, mock_env):
         """Test GitHub Actions environment variable compatibility"""
-        github_output = temp_git_repo / 'github_output'
+        repo_path, run = temp_git_repo
+        
+        github_output = repo_path / 'github_output'
         
         mock_env(
             GITHUB_OUTPUT=str(github_output),
@@ -134,7 +174,7 @@ class TestVersionCalculatorIntegration:
         assert 'commit_count=0' in github_content
         
         # Check GitLab output still created
-        gitlab_output = temp_git_repo / 'operation_outputs.env'
+        gitlab_output = repo_path / 'operation_outputs.env'
         assert gitlab_output.exists()
         gitlab_content = gitlab_output.read_text()
         assert 'CURRENT_VERSION=v0.5.0' in gitlab_content
\ No newline at end of file
@@ -2,7 +2,7 @@ import pytest
 import os
 import subprocess
 import tempfile
-from unittest.mock import patch, mock_open
+from unittest.mock import patch, mock_open, MagicMock
 import sys
 from pathlib import Path
 
@@ -14,6 +14,12 @@ import main
 class TestVersionCalculator:
     """Unit tests for version calculator functions"""
 
+    @pytest.fixture(autouse=True)
+    def no_pygit2(self):
+        """Exercise the git subprocess paths even where pygit2 is installed"""
+        with patch.object(main, '_open_repository', return_value=None):
+            yield
+
     def test_validate_version_format_valid(self):
         """Test validation of valid version formats"""
         assert main.validate_version_format('v1.0.0', 'v') is True
@@ -31,14 +37,47 @@ class TestVersionCalculator:
         with pytest.raises(SystemExit):
             main.validate_version_format('invalid', 'v')
 
+    def test_validate_version_format_escapes_prefix(self):
+        """Test that regex metacharacters in the prefix are matched literally"""
+        assert main.validate_version_format('rel.1.0.0', 'rel.') is True
+        
+        with pytest.raises(SystemExit):
+            main.validate_version_format('relX1.0.0', 'rel.')
+
     @patch('subprocess.check_output')
     def test_get_latest_tag_with_tags(self, mock_subprocess):
         """Test getting latest tag when tags exist"""
-        mock_subprocess.return_value = 'v1.2.0\nv1.1.0\nv1.0.0'
+        mock_subprocess.return_value = 'v1.2.0\n'
         
         result = main.get_latest_tag('v*')
         assert result == 'v1.2.0'
         mock_subprocess.assert_called_once_with(
+            ['git', 'for-each-ref', '--sort=-v:refname', '--count=1',
+             '--format=%(refname:lstrip=2)', 'refs/tags/v*'], text=True
+        )
+
+    @patch('subprocess.check_output')
+    def test_get_latest_tag_full_ref_pattern(self, mock_subprocess):
+        """Test a pattern already under refs/ is passed to git unchanged"""
+        mock_subprocess.return_value = 'v1.2.0\n'
+        
+        assert main.get_latest_tag('refs/tags/v*') == 'v1.2.0'
+        mock_subprocess.assert_called_once_with(
+            ['git', 'for-each-ref', '--sort=-v:refname', '--count=1',
+             '--format=%(refname:lstrip=2)', 'refs/tags/v*'], text=True
+        )
+
+    @patch('subprocess.check_output')
+    def test_get_latest_tag_falls_back_to_tag_list(self, mock_subprocess):
+        """Test falling back to git tag -l when for-each-ref fails"""
+        mock_subprocess.side_effect = [
+            subprocess.CalledProcessError(128, 'git'),
+            'v1.2.0\nv1.1.0\nv1.0.0'
+        ]
+        
+        result = main.get_latest_tag('v*')
+        assert result == 'v1.2.0'
+        mock_subprocess.assert_called_with(
             ['git', 'tag', '-l', 'v*', '--sort=-v:refname'], text=True
         )
 
@@ -57,10 +96,48 @@ class TestVersionCalculator:
         
         result = main.get_commit_count_since_tag('v1.0.0')
         assert result == 5
+        mock_subprocess.assert_called_once_with(
+            ['git', 'rev-list', 'v1.0.0..HEAD', '--count', '--first-parent'], text=True
+        )
+
+    @patch('subprocess.check_output')
+    def test_get_commit_count_since_tag_all(self, mock_subprocess):
+        """Test counting every commit when count mode is 'all'"""
+        mock_subprocess.return_value = '7'
+        
+        assert main.get_commit_count_since_tag('v1.0.0', 'all') == 7
         mock_subprocess.assert_called_once_with(
             ['git', 'rev-list', 'v1.0.0..HEAD', '--count'], text=True
         )
 
+    def test_get_latest_tag_and_count(self):
+        """Test tag lookup and commit count are returned together"""
+        with patch.object(main, 'get_latest_tag', return_value='v1.0.0'), \
+             patch.object(main, 'get_commit_count_since_tag', return_value=3) as mock_count:
+            assert main.get_latest_tag_and_count('v*') == ('v1.0.0', 3)
+            mock_count.assert_called_once_with('v1.0.0', 'first-parent')
+
+    def test_get_latest_tag_and_count_pygit2(self):
+        """Test tags are listed and sorted in-process when pygit2 is available"""
+        repo = MagicMock()
+        repo.references = ['refs/heads/main', 'refs/tags/v1.2.0', 'refs/tags/v1.10.0',
+                           'refs/tags/release-9.0.0']
+        repo.ahead_behind.return_value = (4, 0)
+        
+        with patch.object(main, '_open_repository', return_value=repo), \
+             patch.object(main, '_pygit2', return_value=MagicMock()), \
+             patch('subprocess.check_output') as mock_subprocess:
+            assert main.get_latest_tag_and_count('v*', 'all') == ('v1.10.0', 4)
+            repo.revparse_single.assert_called_once_with('refs/tags/v1.10.0')
+            mock_subprocess.assert_not_called()
+
+    def test_get_latest_tag_and_count_no_tags(self):
+        """Test commit count is skipped when no tag matches"""
+        with patch.object(main, 'get_latest_tag', return_value=None), \
+             patch.object(main, 'get_commit_count_since_tag') as mock_count:
+            assert main.get_latest_tag_and_count('v*') == (None, 0)
+            mock_count.assert_not_called()
+
     @patch('subprocess.check_output')
     def test_setup_git(self, mock_subprocess):
         """Test git setup configuration"""
@@ -74,6 +151,25 @@ class TestVersionCalculator:
                 text=True
             )
 
+    @patch('subprocess.check_output')
+    def test_setup_git_skips_owned_workspace(self, mock_subprocess, tmp_path):
+        """Test git config is not run for a workspace owned by the current user"""
+        with patch.dict(os.environ, {'CI_PROJECT_DIR': str(tmp_path)}):
+            main.setup_git()
+        
+        mock_subprocess.assert_not_called()
+
+    @patch('subprocess.check_output')
+    def test_setup_git_skips_configured_safe_directory(self, mock_subprocess, tmp_path, monkeypatch):
+        """Test git config is not run when safe.directory already covers the workspace"""
+        (tmp_path / '.gitconfig').write_text('[safe]\n\tdirectory = *\n')
+        monkeypatch.setenv('HOME', str(tmp_path))
+        
+        with patch.dict(os.environ, {'CI_PROJECT_DIR': '/test/other-project'}):
+            main.setup_git()
+        
+        mock_subprocess.assert_not_called()
+
     @patch('builtins.open', new_callable=mock_open)
     def test_write_outputs_github(self, mock_file):
         """Test writing outputs for GitHub Actions"""
@@ -88,8 +184,21 @@ class TestVersionCalculator:
         """Test writing outputs for GitLab CI"""
         main.write_outputs('v1.0.0', 'v1.0.1', 5)
         
-        # Check GitLab output was written
+        # Check GitLab output was written in one call
         mock_file.assert_any_call('operation_outputs.env', 'w')
+        mock_file().write.assert_called_once_with(
+            "CURRENT_VERSION=v1.0.0\nNEXT_VERSION=v1.0.1\nCOMMIT_COUNT=5\n"
+        )
+
+    def test_get_input(self, mock_env, clean_env):
+        """Test input lookup order and default"""
+        assert main.get_input('TAG_PATTERN', 'v*') == 'v*'
+        
+        mock_env(TAG_PATTERN='release-*')
+        assert main.get_input('TAG_PATTERN', 'v*') == 'release-*'
+        
+        mock_env(INPUT_TAG_PATTERN='rc-*')
+        assert main.get_input('TAG_PATTERN', 'v*') == 'rc-*'
 
     def test_main_environment_variable_priority(self, mock_env, clean_env):
         """Test that INPUT_ variables take priority over regular variables"""
@@ -111,4 +220,47 @@ class TestVersionCalculator:
             
             # Should use INPUT_ variables
             mock_validate.assert_called_with('v2.0.0', 'rel-')
-            mock_get_tag.assert_called_with('v*')  # Default tag pattern
\ No newline at end of file
+            mock_get_tag.assert_called_with('v*')  # Default tag pattern
+
+    @pytest.mark.parametrize('variable, value', [
+        ('TAG_PATTERN', 'v* --all'),
+        ('TAG_PATTERN', ''),
+        ('VERSION_PREFIX', 'v*'),
+        ('VERSION_PREFIX', 'v;'),
+        ('COUNT_MODE', 'al'),
+    ])
+    def test_main_rejects_malformed_inputs(self, variable, value, clean_env, mock_env):
+        """Test that malformed tag patterns, prefixes and count modes exit with status 2 before git runs"""
+        mock_env(**{variable: value})
+        
+        with patch.object(main, 'setup_git') as mock_setup, \
+             patch.object(main, 'get_latest_tag_and_count') as mock_get_tag:
+            
+            with pytest.raises(SystemExit) as exc_info:
+                main.main()
+            
+            assert exc_info.value.code == 2
+            mock_setup.assert_not_called()
+            mock_get_tag.assert_not_called()
+
+    @pytest.mark.parametrize('latest_tag', ['v1.2', 'v1.2.x', 'release-1.2.3'])
+    def test_main_invalid_latest_tag(self, latest_tag, clean_env):
+        """Test that a latest tag not in prefix + MAJOR.MINOR.PATCH form exits"""
+        with patch.object(main, 'setup_git'), \
+             patch.object(main, 'get_latest_tag_and_count', return_value=(latest_tag, 2)), \
+             patch.object(main, 'write_outputs') as mock_write:
+            
+            with pytest.raises(SystemExit):
+                main.main()
+            
+            mock_write.assert_not_called()
+
+    def test_main_suffixed_latest_tag(self, clean_env):
+        """Test that a suffixed tag such as v1.2.3-rc1 still bumps its X.Y.Z"""
+        with patch.object(main, 'setup_git'), \
+             patch.object(main, 'get_latest_tag_and_count', return_value=('v1.2.3-rc1', 1)), \
+             patch.object(main, 'write_outputs') as mock_write:
+            
+            main.main()
+            
+            mock_write.assert_called_once_with('v1.2.3-rc1', 'v1.2.4', 1)
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+GitLab dotenv output writer shared by the operation scripts
+"""
+
+import os
+
+
+def _dotenv_escape(value):
+    """Escape a value for a double-quoted dotenv entry"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def write_dotenv_outputs(outputs, path='operation_outputs.env'):
+    """Write outputs as GitLab dotenv entries, one line per key
+
+    Values are escaped so quotes and newlines cannot break the line
+    structure. The payload is built once and written with os.write,
+    looping until a large value such as FILE_CONTENT is fully written.
+    """
+    view = memoryview(''.join(
+        f'{key.upper()}="{_dotenv_escape(value)}"\n' for key, value in outputs.items()
+    ).encode('utf-8'))
+
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
@@ -5,40 +5,61 @@ Implements the actual logic for FCM-defined git operations
 """
 
 import os
+import re
 import sys
+import shutil
+import fnmatch
 import subprocess
 import json
 from pathlib import Path
 
+from dotenv_outputs import write_dotenv_outputs
+
+# Absolute path to git; subprocess only takes the posix_spawn fast path for
+# an executable given with a directory component
+_GIT = shutil.which('git') or 'git'
+
 
 class GitOperations:
     """Handle git operations based on FCM definitions"""
     
     def __init__(self):
-        self.operation = os.environ.get('OPERATION', '').lower()
-        self.sub_operation = os.environ.get('SUB_OPERATION', '').lower()
+        # One snapshot of the environment for every setting below
+        env = dict(os.environ)
+        
+        self.operation = env.get('OPERATION', '').lower()
+        self.sub_operation = env.get('SUB_OPERATION', '').lower()
         
         # Branch operations
-        self.branch_name = os.environ.get('BRANCH_NAME', '')
-        self.target_branch = os.environ.get('TARGET_BRANCH', '')
+        self.branch_name = env.get('BRANCH_NAME', '')
+        self.target_branch = env.get('TARGET_BRANCH', '')
         
         # Commit operations
-        self.commit_message = os.environ.get('COMMIT_MESSAGE', '')
-        self.commit_sha = os.environ.get('COMMIT_SHA', '')
-        self.files_to_add = os.environ.get('FILES_TO_ADD', '')
+        self.commit_message = env.get('COMMIT_MESSAGE', '')
+        self.commit_sha = env.get('COMMIT_SHA', '')
+        self.files_to_add = env.get('FILES_TO_ADD', '')
         
         # Tag operations
-        self.tag_name = os.environ.get('TAG_NAME', '')
-        self.tag_message = os.environ.get('TAG_MESSAGE', '')
+        self.tag_name = env.get('TAG_NAME', '')
+        self.tag_message = env.get('TAG_MESSAGE', '')
         
         # Common flags
-        self.remote = os.environ.get('REMOTE', 'false').lower() == 'true'
-        self.force = os.environ.get('FORCE', 'false').lower() == 'true'
-        self.include_remote = os.environ.get('INCLUDE_REMOTE', 'false').lower() == 'true'
-        self.pattern = os.environ.get('PATTERN', '')
+        self.remote = env.get('REMOTE', 'false').lower() == 'true'
+        self.force = env.get('FORCE', 'false').lower() == 'true'
+        self.include_remote = env.get('INCLUDE_REMOTE', 'false').lower() == 'true'
+        self.pattern = env.get('PATTERN', '')
         
         # For outputs
         self.outputs = {}
+        
+        # Environment for git subprocesses: skip optional locks and locale setup
+        self._git_env = dict(env, GIT_OPTIONAL_LOCKS='0', LC_ALL='C')
+        
+        # Point git at the repository once so no call has to rediscover it
+        git_dir = os.path.join(os.getcwd(), '.git')
+        if 'GIT_DIR' not in self._git_env and os.path.isdir(git_dir):
+            self._git_env['GIT_DIR'] = git_dir
+            self._git_env['GIT_WORK_TREE'] = os.getcwd()
     
     def run(self):
         """Execute the requested git operation"""
@@ -81,9 +102,9 @@ class GitOperations:
         
         base_branch = self.target_branch or 'main'
         
-        # Try to fetch from remote if it exists
+        # Try to fetch the base branch from remote if it exists
         try:
-            self._run_git(['fetch', 'origin'])
+            self._run_git(['fetch', 'origin', f'+refs/heads/{base_branch}:refs/remotes/origin/{base_branch}'])
             branch_ref = f'origin/{base_branch}'
         except subprocess.CalledProcessError:
             # No remote or fetch failed, use local branch
@@ -120,26 +141,25 @@ class GitOperations:
     
     def list_branches(self):
         """List branches"""
-        list_args = ['branch']
+        list_args = ['for-each-ref', '--format=%(refname)', 'refs/heads']
         
         if self.include_remote:
-            list_args.append('-a')
+            list_args.append('refs/remotes')
         
-        if self.pattern:
-            list_args.extend(['--list', self.pattern])
-        
-        result = self._run_git(list_args, capture=True)
-        
-        # Parse branch names
+        # Strip ref namespaces; origin branches are reported by bare name
         branches = []
-        for line in result.strip().split('\n'):
-            if line:
-                # Remove leading * and spaces
-                branch = line.strip().lstrip('* ')
-                # Remove remote prefix for remote branches
-                if branch.startswith('remotes/origin/'):
-                    branch = branch.replace('remotes/origin/', '')
-                branches.append(branch)
+        for ref in self._iter_git_lines(list_args):
+            if ref.startswith('refs/heads/'):
+                branches.append(ref[11:])
+            elif ref.startswith('refs/remotes/origin/'):
+                if ref != 'refs/remotes/origin/HEAD':
+                    branches.append(ref[20:])
+            else:
+                branches.append(ref[5:])
+        
+        if self.pattern:
+            match = re.compile(fnmatch.translate(self.pattern)).match
+            branches = [branch for branch in branches if match(branch)]
         
         self.outputs['branches_list'] = ','.join(branches)
         self.outputs['operation_status'] = 'success'
@@ -155,8 +175,7 @@ class GitOperations:
         
         self._run_git(checkout_args)
         
-        # Get current branch
-        current = self._run_git(['rev-parse', '--abbrev-ref', 'HEAD'], capture=True).strip()
+        current = self._current_branch()
         
         self.outputs['current_branch'] = current
         self.outputs['operation_status'] = 'success'
@@ -189,15 +208,13 @@ class GitOperations:
         
         # Add files if specified
         if self.files_to_add:
-            files = [f.strip() for f in self.files_to_add.split(',')]
-            for file in files:
-                self._run_git(['add', file])
+            self._add_files()
         
         # Create commit
         self._run_git(['commit', '-m', self.commit_message])
         
         # Get commit SHA
-        commit_sha = self._run_git(['rev-parse', 'HEAD'], capture=True).strip()
+        commit_sha = self._head_sha()
         
         self.outputs['commit_sha'] = commit_sha
         self.outputs['commit_message'] = self.commit_message
@@ -214,14 +231,12 @@ class GitOperations:
         
         # Add files if specified
         if self.files_to_add:
-            files = [f.strip() for f in self.files_to_add.split(',')]
-            for file in files:
-                self._run_git(['add', file])
+            self._add_files()
         
         self._run_git(amend_args)
         
         # Get updated commit SHA
-        commit_sha = self._run_git(['rev-parse', 'HEAD'], capture=True).strip()
+        commit_sha = self._head_sha()
         
         self.outputs['commit_sha'] = commit_sha
         self.outputs['operation_status'] = 'success'
@@ -240,7 +255,7 @@ class GitOperations:
         self._run_git(revert_args)
         
         # Get revert commit SHA
-        commit_sha = self._run_git(['rev-parse', 'HEAD'], capture=True).strip()
+        commit_sha = self._head_sha()
         
         self.outputs['revert_commit_sha'] = commit_sha
         self.outputs['reverted_commit'] = self.commit_sha
@@ -289,11 +304,9 @@ class GitOperations:
         if self.pattern:
             list_args.extend(['-l', self.pattern])
         
-        result = self._run_git(list_args, capture=True)
-        
         # Parse tag names
         tags = []
-        for line in result.strip().split('\n'):
+        for line in self._iter_git_lines(list_args):
             if line.strip():
                 tags.append(line.strip())
         
@@ -315,23 +328,89 @@ class GitOperations:
         self.outputs['tag_pushed'] = self.tag_name
         self.outputs['operation_status'] = 'success'
     
+    def _add_files(self):
+        """Stage every file in FILES_TO_ADD with a single git add"""
+        files = [f.strip() for f in self.files_to_add.split(',') if f.strip()]
+        self._run_git(['add', '--'] + files)
+    
+    def _head_sha(self):
+        """Get the commit HEAD points at, reading the loose ref a commit just wrote"""
+        try:
+            with open(os.path.join(self._git_env.get('GIT_DIR', '.git'), 'HEAD')) as f:
+                head = f.read().strip()
+            if head.startswith('ref: '):
+                with open(os.path.join(self._git_env.get('GIT_DIR', '.git'), head[5:])) as f:
+                    head = f.read().strip()
+        except OSError:
+            head = ''
+        
+        if len(head) in (40, 64) and all(c in '0123456789abcdef' for c in head):
+            return head
+        
+        # Packed or reftable refs: let git resolve it
+        return self._run_git(['rev-parse', 'HEAD'], capture=True).strip()
+    
+    def _current_branch(self):
+        """Get the checked out branch, reading .git/HEAD when possible"""
+        try:
+            with open(os.path.join(self._git_env.get('GIT_DIR', '.git'), 'HEAD')) as f:
+                head = f.read().strip()
+        except OSError:
+            head = ''
+        
+        # Reftable repositories keep a placeholder 'refs/heads/.invalid' here
+        _, ref, branch = head.partition('ref: refs/heads/')
+        if ref and branch != '.invalid':
+            return branch
+        
+        # Detached HEAD, reftable refs or a non-standard git dir; let git report it
+        return self._run_git(['rev-parse', '--abbrev-ref', 'HEAD'], capture=True).strip()
+    
     def _run_git(self, args, capture=False):
         """Run a git command"""
         cmd = ['git'] + args
         print(f"Running: {' '.join(cmd)}")
         
-        if capture:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            return result.stdout
-        else:
-            subprocess.run(cmd, check=True)
+        # close_fds=False spares the child closing every inherited descriptor
+        # and, with an absolute executable and no cwd, lets subprocess spawn
+        # git through posix_spawn instead of fork + exec
+        result = subprocess.run(
+            cmd,
+            executable=_GIT,
+            stdout=subprocess.PIPE if capture else None,
+            text=True,
+            check=True,
+            env=self._git_env,
+            close_fds=False
+        )
+        return result.stdout
+    
+    def _iter_git_lines(self, args):
+        """Run a git command, yielding its output lines as git produces them
+        
+        Avoids holding git's whole output in memory on repositories with
+        many refs.
+        """
+        cmd = ['git'] + args
+        print(f"Running: {' '.join(cmd)}")
+        
+        with subprocess.Popen(
+            cmd,
+            executable=_GIT,
+            stdout=subprocess.PIPE,
+            text=True,
+            env=self._git_env,
+            close_fds=False
+        ) as process:
+            for line in process.stdout:
+                yield line.rstrip('\n')
+        
+        if process.returncode:
+            raise subprocess.CalledProcessError(process.returncode, cmd)
     
     def _write_outputs(self):
         """Write outputs to dotenv file for GitLab"""
-        with open('operation_outputs.env', 'w') as f:
-            for key, value in self.outputs.items():
-                # GitLab dotenv format
-                f.write(f'{key.upper()}="{value}"\n')
+        write_dotenv_outputs(self.outputs)
 
 
 def main():
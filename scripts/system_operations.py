@@ -5,19 +5,170 @@ Adapted from github.toolkit complete-action-example for GitLab CI/CD
 """
 
 import os
+import re
+import errno
 import sys
 import glob
 import shutil
-import base64
 from pathlib import Path
 from typing import Optional, List, Union, Tuple
 
+from dotenv_outputs import write_dotenv_outputs
+
+# pybase64 is a SIMD-accelerated drop-in for base64; fall back when absent
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
+
+def _b64encode_str(data: bytes) -> str:
+    """Base64-encode data straight to an ASCII string"""
+    if hasattr(base64, 'b64encode_as_string'):
+        return base64.b64encode_as_string(data)
+    return base64.b64encode(data).decode('ascii')
+
+
+# Buffer size for file writes; larger buffers amortize syscall overhead
+_IO_BUFSIZE = 1 << 20
+
+# Base64 characters decoded per step (~1 MiB decoded); a multiple of 4
+# keeps quanta whole
+_B64_DECODE_CHUNK = _IO_BUFSIZE // 3 * 4
+
+# Bytes encoded per step; a multiple of 3 so chunks encode without padding
+_B64_ENCODE_CHUNK = _IO_BUFSIZE // 3 * 3
+_WHITESPACE_RE = re.compile(r'\s')
+
+
+# Most iovecs one writev call accepts on Linux
+_IOV_MAX = 1024
+
+
+def _write_text(path: Path, content: str, encoding: str, exclusive: bool = False) -> int:
+    """Write text content to path and return the resulting file size
+    
+    The content is encoded once and handed to the kernel directly: a
+    single os.write when it fits in one buffer, otherwise os.writev over
+    buffer-sized slices, skipping the TextIOWrapper/BufferedWriter layers.
+    With exclusive, an existing path raises FileExistsError.
+    """
+    view = memoryview(content.encode(encoding))
+    flags = os.O_WRONLY | os.O_CREAT | (os.O_EXCL if exclusive else os.O_TRUNC)
+    fd = os.open(path, flags, 0o666)
+    try:
+        while view:
+            if len(view) <= _IO_BUFSIZE:
+                written = os.write(fd, view)
+            else:
+                end = min(len(view), _IO_BUFSIZE * _IOV_MAX)
+                written = os.writev(fd, [view[i:i + _IO_BUFSIZE] for i in range(0, end, _IO_BUFSIZE)])
+            view = view[written:]
+        return os.fstat(fd).st_size
+    finally:
+        os.close(fd)
+
+
+def _write_base64(path: Path, content: str, exclusive: bool = False) -> int:
+    """Decode base64 content into path a chunk at a time
+    
+    Avoids holding the whole decoded payload in memory next to the encoded
+    string. Whitespace (line-wrapped input) is dropped first so chunk
+    boundaries stay aligned to 4-character quanta. Chunks decode strictly
+    into a temporary file beside path, which is moved into place only once
+    the whole payload decoded, so bad input never truncates an existing
+    file or leaves a partial new one. With exclusive, an existing path
+    raises FileExistsError. Returns the file size.
+    """
+    if _WHITESPACE_RE.search(content):
+        content = ''.join(content.split())
+    
+    # Replace the file a symlink points at, not the symlink itself
+    target = path if exclusive else Path(os.path.realpath(path))
+    tmp_path = target.with_name(f'.{target.name}.{os.urandom(4).hex()}.tmp')
+    try:
+        with open(tmp_path, 'xb', buffering=_IO_BUFSIZE) as f:
+            for start in range(0, len(content), _B64_DECODE_CHUNK):
+                f.write(base64.b64decode(content[start:start + _B64_DECODE_CHUNK], validate=True))
+            f.flush()
+            size = os.fstat(f.fileno()).st_size
+            if not exclusive:
+                try:
+                    os.chmod(f.fileno(), os.stat(target).st_mode & 0o7777)
+                except FileNotFoundError:
+                    pass
+        
+        if exclusive:
+            # link refuses an existing path atomically, like O_EXCL
+            os.link(tmp_path, target)
+        else:
+            os.replace(tmp_path, target)
+    finally:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+    return size
+
+
+def _readinto_full(f, view: memoryview) -> int:
+    """Fill view from f, stopping short only at end of file"""
+    total = 0
+    while total < len(view):
+        n = f.readinto(view[total:])
+        if not n:
+            break
+        total += n
+    return total
+
+
+# Bytes requested per copy_file_range call; the kernel may copy less
+_COPY_CHUNK = 1 << 30
+
+# copy_file_range errors meaning "not supported here", not a real failure
+_COPY_FALLBACK_ERRNOS = frozenset(
+    code for code in (errno.EXDEV, errno.ENOSYS, errno.EINVAL,
+                      getattr(errno, 'EOPNOTSUPP', None))
+    if code is not None
+)
+
+
+def _fast_copy(src: Path, dst: Path, exclusive: bool = False) -> int:
+    """Copy file contents from src to dst and return the copied size
+    
+    Uses os.copy_file_range where available so the kernel can reflink or
+    copy server side (btrfs, XFS, NFS), falling back to a readinto loop.
+    With exclusive, an existing dst raises FileExistsError.
+    """
+    with open(src, 'rb') as fsrc, open(dst, 'xb' if exclusive else 'wb') as fdst:
+        if hasattr(os, 'copy_file_range'):
+            try:
+                while os.copy_file_range(fsrc.fileno(), fdst.fileno(), _COPY_CHUNK):
+                    pass
+                return os.fstat(fdst.fileno()).st_size
+            except OSError as e:
+                if e.errno not in _COPY_FALLBACK_ERRNOS:
+                    raise
+        
+        # File offsets advance with copy_file_range, so this resumes cleanly
+        buf = bytearray(_IO_BUFSIZE)
+        view = memoryview(buf)
+        while True:
+            n = fsrc.readinto(buf)
+            if not n:
+                break
+            fdst.write(view[:n])
+        fdst.flush()
+        return os.fstat(fdst.fileno()).st_size
+
 
 class FileOperations:
     """Handles atomic file system operations following LCMCP principles."""
     
     def __init__(self):
         self.outputs = {}
+        # Read buffer reused across base64 reads
+        self._iobuf = bytearray(_B64_ENCODE_CHUNK)
     
     def create_file(self, file_path: str, content: str = "", 
                    encoding: str = "utf-8", create_dirs: bool = True,
@@ -26,28 +177,25 @@ class FileOperations:
         try:
             path = Path(file_path)
             
-            # Check if file exists and overwrite is False
-            if path.exists() and not overwrite:
-                return False, f"File already exists: {file_path}"
-            
             # Create parent directories if requested
             if create_dirs:
                 path.parent.mkdir(parents=True, exist_ok=True)
             
-            # Handle different encodings
-            if encoding == "base64":
-                # Decode base64 content
-                decoded_content = base64.b64decode(content)
-                with open(path, 'wb') as f:
-                    f.write(decoded_content)
-            else:
-                # Write as text
-                with open(path, 'w', encoding=encoding) as f:
-                    f.write(content)
+            # Handle different encodings; without overwrite the open itself
+            # refuses an existing file
+            try:
+                if encoding == "base64":
+                    # Decode base64 content
+                    size = _write_base64(path, content, exclusive=not overwrite)
+                else:
+                    # Write as text
+                    size = _write_text(path, content, encoding, exclusive=not overwrite)
+            except FileExistsError:
+                return False, f"File already exists: {file_path}"
             
             # Set outputs
             self.outputs['file_created'] = str(path.absolute())
-            self.outputs['file_size'] = str(path.stat().st_size)
+            self.outputs['file_size'] = str(size)
             self.outputs['file_exists'] = 'true'
             
             return True, f"File created successfully: {file_path}"
@@ -66,16 +214,16 @@ class FileOperations:
             
             if encoding == "base64":
                 # Read as binary and encode to base64
-                with open(path, 'rb') as f:
-                    content = base64.b64encode(f.read()).decode('ascii')
+                content, size = self._read_base64(path)
             else:
                 # Read as text
                 with open(path, 'r', encoding=encoding) as f:
                     content = f.read()
+                    size = os.fstat(f.fileno()).st_size
             
             # Set outputs
             self.outputs['file_content'] = content
-            self.outputs['file_size'] = str(path.stat().st_size)
+            self.outputs['file_size'] = str(size)
             self.outputs['file_exists'] = 'true'
             
             return True, content, f"File read successfully: {file_path}"
@@ -83,6 +231,33 @@ class FileOperations:
         except Exception as e:
             return False, "", f"Failed to read file: {str(e)}"
     
+    def _read_base64(self, path: Path) -> Tuple[str, int]:
+        """Base64-encode a file through the reusable read buffer
+        
+        Returns the encoded content and the file size. Larger files are
+        encoded chunk by chunk into one output buffer sized up front.
+        """
+        view = memoryview(self._iobuf)
+        with open(path, 'rb', buffering=0) as f:
+            size = os.fstat(f.fileno()).st_size
+            
+            n = _readinto_full(f, view)
+            if n < len(view):
+                return _b64encode_str(view[:n]), size
+            
+            encoded = bytearray(((size + 2) // 3) * 4)
+            pos = 0
+            while n:
+                chunk = base64.b64encode(view[:n])
+                encoded[pos:pos + len(chunk)] = chunk
+                pos += len(chunk)
+                if n < len(view):
+                    break
+                n = _readinto_full(f, view)
+            del encoded[pos:]
+        
+        return encoded.decode('ascii'), size
+    
     def update_file(self, file_path: str, content: str, 
                    encoding: str = "utf-8") -> Tuple[bool, str]:
         """Update an existing file with new content."""
@@ -94,15 +269,12 @@ class FileOperations:
             
             # Handle different encodings
             if encoding == "base64":
-                decoded_content = base64.b64decode(content)
-                with open(path, 'wb') as f:
-                    f.write(decoded_content)
+                size = _write_base64(path, content)
             else:
-                with open(path, 'w', encoding=encoding) as f:
-                    f.write(content)
+                size = _write_text(path, content, encoding)
             
             # Set outputs
-            self.outputs['file_size'] = str(path.stat().st_size)
+            self.outputs['file_size'] = str(size)
             self.outputs['file_exists'] = 'true'
             
             return True, f"File updated successfully: {file_path}"
@@ -115,11 +287,11 @@ class FileOperations:
         try:
             path = Path(file_path)
             
-            if not path.exists():
+            try:
+                path.unlink()
+            except FileNotFoundError:
                 return False, f"File not found: {file_path}"
             
-            path.unlink()
-            
             # Set outputs
             self.outputs['file_deleted'] = str(path.absolute())
             self.outputs['file_exists'] = 'false'
@@ -139,17 +311,22 @@ class FileOperations:
             if not src_path.exists():
                 return False, f"Source file not found: {file_path}"
             
-            if dest_path.exists() and not overwrite:
-                return False, f"Destination already exists: {destination}"
-            
             # Create parent directories if requested
             if create_dirs:
                 dest_path.parent.mkdir(parents=True, exist_ok=True)
             
-            shutil.copy2(src_path, dest_path)
+            if overwrite and dest_path.is_dir():
+                dest_path = dest_path / src_path.name
+            
+            # Without overwrite the destination open refuses existing paths
+            try:
+                size = _fast_copy(src_path, dest_path, exclusive=not overwrite)
+            except FileExistsError:
+                return False, f"Destination already exists: {destination}"
+            shutil.copystat(src_path, dest_path)
             
             # Set outputs
-            self.outputs['file_size'] = str(dest_path.stat().st_size)
+            self.outputs['file_size'] = str(size)
             self.outputs['file_exists'] = 'true'
             
             return True, f"File copied successfully: {file_path} -> {destination}"
@@ -174,7 +351,21 @@ class FileOperations:
             if create_dirs:
                 dest_path.parent.mkdir(parents=True, exist_ok=True)
             
-            shutil.move(str(src_path), str(dest_path))
+            if dest_path.is_dir():
+                dest_path = dest_path / src_path.name
+            
+            try:
+                os.rename(src_path, dest_path)
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+                if src_path.is_dir():
+                    shutil.move(str(src_path), str(dest_path))
+                else:
+                    # Across filesystems: kernel-side copy, then drop the source
+                    _fast_copy(src_path, dest_path, exclusive=not overwrite)
+                    shutil.copystat(src_path, dest_path)
+                    os.unlink(src_path)
             
             # Set outputs
             self.outputs['file_size'] = str(dest_path.stat().st_size)
@@ -188,7 +379,8 @@ class FileOperations:
     def search_files(self, pattern: str, base_path: str = ".") -> Tuple[bool, List[str], str]:
         """Search for files matching a pattern."""
         try:
-            # Use glob to find matching files
+            # Use glob to find matching files; fnmatch caches each compiled
+            # component pattern, so repeated searches skip recompiling
             search_pattern = os.path.join(base_path, pattern)
             found_files = glob.glob(search_pattern, recursive=True)
             
@@ -204,24 +396,30 @@ class FileOperations:
             return False, [], f"Failed to search files: {str(e)}"
 
 
+# Spellings accepted as true for boolean flags
+_TRUE_VALUES = frozenset({'true', '1', 'yes', 'on'})
+
+
 class GitLabFileOperationsRunner:
     """GitLab CI/CD runner for file operations"""
     
     def __init__(self):
-        self.operation = os.environ.get('OPERATION', '').lower()
-        self.file_path = os.environ.get('FILE_PATH', '')
-        self.content = os.environ.get('CONTENT', '')
-        self.destination = os.environ.get('DESTINATION', '')
-        self.pattern = os.environ.get('PATTERN', '')
-        self.encoding = os.environ.get('ENCODING', 'utf-8')
-        self.create_dirs = os.environ.get('CREATE_DIRS', 'true').lower() == 'true'
-        self.overwrite = os.environ.get('OVERWRITE', 'false').lower() == 'true'
+        # One snapshot of the environment for every setting read below
+        env = dict(os.environ)
+        
+        self.operation = env.get('OPERATION', '').lower()
+        self.file_path = env.get('FILE_PATH', '')
+        self.content = env.get('CONTENT', '')
+        self.destination = env.get('DESTINATION', '')
+        self.pattern = env.get('PATTERN', '')
+        self.encoding = env.get('ENCODING', 'utf-8')
+        self.create_dirs = env.get('CREATE_DIRS', 'true').lower() in _TRUE_VALUES
+        self.overwrite = env.get('OVERWRITE', 'false').lower() in _TRUE_VALUES
         
         self.file_ops = FileOperations()
-    
-    def run(self):
-        """Execute the requested file operation"""
-        operations = {
+        
+        # The operation is fixed for the runner's lifetime; resolve it once
+        self._op = {
             'create': self._create,
             'read': self._read,
             'update': self._update,
@@ -229,14 +427,16 @@ class GitLabFileOperationsRunner:
             'copy': self._copy,
             'move': self._move,
             'search': self._search
-        }
-        
-        if self.operation not in operations:
+        }.get(self.operation)
+    
+    def run(self):
+        """Execute the requested file operation"""
+        if self._op is None:
             print(f"ERROR: Unknown operation '{self.operation}'")
             sys.exit(1)
         
         try:
-            success, message = operations[self.operation]()
+            success, message = self._op()
             
             if success:
                 self.file_ops.outputs['operation_status'] = 'success'
@@ -298,10 +498,7 @@ class GitLabFileOperationsRunner:
     
     def _write_outputs(self):
         """Write outputs to dotenv file for GitLab"""
-        with open('operation_outputs.env', 'w') as f:
-            for key, value in self.file_ops.outputs.items():
-                # GitLab dotenv format
-                f.write(f'{key.upper()}="{value}"\n')
+        write_dotenv_outputs(self.file_ops.outputs)
 
 
 def main():
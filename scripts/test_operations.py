@@ -7,6 +7,8 @@ Simple test runner for minimal FCM testing
 import os
 import sys
 
+from dotenv_outputs import write_dotenv_outputs
+
 
 class TestOperations:
     """Handle test operations from FCM definitions"""
@@ -32,10 +34,7 @@ class TestOperations:
     
     def _write_outputs(self):
         """Write outputs to dotenv file for GitLab"""
-        with open('operation_outputs.env', 'w') as f:
-            for key, value in self.outputs.items():
-                # GitLab dotenv format
-                f.write(f'{key.upper()}="{value}"\n')
+        write_dotenv_outputs(self.outputs)
 
 
 def main():
@@ -0,0 +1,103 @@
+import pytest
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import mirror_operations
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import mirror_operations
+
+
+class TestExcludePatterns:
+    """Unit tests for mirror exclude pattern matching"""
+
+    SOURCE_ONLY_EXCLUDES = [
+        '.gitlab-ci/jobs/',
+        '.gitlab-ci/templates/',
+        '.venv/',
+        '__pycache__/',
+        '*.pyc',
+        '.env',
+    ]
+
+    def excluded(self, path, patterns):
+        excludes = mirror_operations._compile_excludes(patterns)
+        return mirror_operations._is_excluded(os.path.normpath(path), excludes)
+
+    @pytest.mark.parametrize('path', [
+        '.gitlab-ci/jobs/calculator.yml',
+        '.gitlab-ci/templates/nested/ops.yml',
+        '.venv/lib/x.py',
+        'a/.venv/lib/x.py',
+        '__pycache__/main.cpython-311.pyc',
+        'scripts/__pycache__/README',
+        'actions/core/__pycache__/deep/file.txt',
+        'scripts/main.pyc',
+        '.env',
+        'config/.env',
+    ])
+    def test_source_only_excludes_match(self, path):
+        """Test that directory excludes drop everything beneath the directory at any depth"""
+        assert self.excluded(path, self.SOURCE_ONLY_EXCLUDES) is True
+
+    @pytest.mark.parametrize('path', [
+        '.gitlab-ci/config/mirror-config.yml',
+        'scripts/mirror_operations.py',
+        'docs/jobs/index.md',
+        'README.md',
+        '.environment',
+    ])
+    def test_source_only_excludes_keep(self, path):
+        """Test that paths outside the excluded directories are kept"""
+        assert self.excluded(path, self.SOURCE_ONLY_EXCLUDES) is False
+
+    def test_directory_exclude(self):
+        """Test that a selective directory exclude removes the whole directory"""
+        assert self.excluded('secrets/token.txt', ['secrets/']) is True
+        assert self.excluded('secrets/nested/key.pem', ['secrets/']) is True
+        assert self.excluded('app/secrets/key.pem', ['secrets/']) is True
+        assert self.excluded('secrets.md', ['secrets/']) is False
+
+    def test_directory_pattern_does_not_match_files(self):
+        """Test that a pattern ending in '/' only matches directories"""
+        assert self.excluded('docs/build', ['build/']) is False
+        assert self.excluded('docs/build', ['build']) is True
+        assert self.excluded('docs/build/index.html', ['build']) is True
+
+    def test_empty_patterns_ignored(self):
+        """Test that blank and bare '/' patterns exclude nothing"""
+        assert mirror_operations._compile_excludes(['', '/']) == []
+
+
+class TestCollectFiles:
+    """Unit tests for selecting checkout files to mirror"""
+
+    @pytest.fixture
+    def checkout(self, tmp_path, monkeypatch):
+        """Git checkout with a tracked source file and an ignored build output"""
+        subprocess.run(['git', 'init', '-q'], cwd=tmp_path, check=True)
+        (tmp_path / '.gitignore').write_text('dist/\n')
+        (tmp_path / 'src').mkdir()
+        (tmp_path / 'src' / 'app.py').write_text('print("hi")\n')
+        subprocess.run(['git', 'add', '.'], cwd=tmp_path, check=True)
+        (tmp_path / 'dist').mkdir()
+        (tmp_path / 'dist' / 'app.js').write_text('console.log("hi")\n')
+        monkeypatch.chdir(tmp_path)
+        return tmp_path
+
+    def collect(self, include_patterns, exclude_patterns=()):
+        mirror = mirror_operations.RepositoryMirror.__new__(mirror_operations.RepositoryMirror)
+        return mirror._collect_files(include_patterns, list(exclude_patterns))
+
+    def test_gitignored_artifacts_included(self, checkout):
+        """Test that gitignored build output is mirrored when its pattern is included"""
+        assert self.collect(['dist']) == ['dist/app.js']
+
+    def test_tracked_and_ignored_files(self, checkout):
+        """Test that tracked files and ignored output are both selected"""
+        assert sorted(self.collect(['src', 'dist'])) == ['dist/app.js', 'src/app.py']
+
+    def test_excludes_apply_to_ignored_files(self, checkout):
+        """Test that exclude patterns still drop ignored output"""
+        assert self.collect(['src', 'dist'], ['dist/']) == ['src/app.py']
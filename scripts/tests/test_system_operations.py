@@ -0,0 +1,49 @@
+import pytest
+import glob
+import os
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import system_operations
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import system_operations
+
+
+class TestSearchFiles:
+    """Unit tests for search_files against glob.glob"""
+
+    @pytest.fixture
+    def tree(self, tmp_path, monkeypatch):
+        """Small tree with nested directories, dotfiles and mixed extensions"""
+        for path in ['README.md', 'setup.py', '.hidden.py',
+                     'src/app.py', 'src/util.py', 'src/data.json',
+                     'src/pkg/__init__.py', 'src/pkg/core.py',
+                     'docs/index.md', 'docs/api/ref.md', '.cache/x.py']:
+            (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+            (tmp_path / path).write_text('x\n')
+        (tmp_path / 'empty').mkdir()
+        monkeypatch.chdir(tmp_path)
+        return tmp_path
+
+    @pytest.mark.parametrize('pattern', [
+        '*', '*.py', '*/', '*/*', '*/*/', '**', '**/', '**/*.py', 'src/**',
+        'src/**/*.py', '**/pkg/*.py', 'src/[au]*.py', 'src/?til.py',
+        '.*', 'docs/*/ref.md', 'missing/*.py', 'setup.py',
+    ])
+    def test_matches_glob(self, tree, pattern):
+        """Test that search_files returns exactly what glob.glob returns, in order"""
+        expected = [os.path.relpath(f) for f in glob.glob(os.path.join('.', pattern), recursive=True)]
+        ops = system_operations.FileOperations()
+
+        success, found, _ = ops.search_files(pattern)
+
+        assert success is True
+        assert found == expected
+
+    def test_trailing_separator_matches_directories_only(self, tree):
+        """Test that a pattern ending in '/' only returns directories"""
+        ops = system_operations.FileOperations()
+
+        _, found, _ = ops.search_files('*/*/')
+
+        assert sorted(found) == ['docs/api', 'src/pkg']
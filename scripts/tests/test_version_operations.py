@@ -0,0 +1,173 @@
+import pytest
+import io
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+# Add parent directory to path to import version_operations
+sys.path.insert(0, str(Path(__file__).parent.parent))
+import version_operations
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """Git repository with a tagged commit followed by two more commits"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('CI_PROJECT_DIR', str(tmp_path))
+    monkeypatch.delenv('GITLAB_CI', raising=False)
+
+    def git(*args):
+        return subprocess.run(['git', *args], cwd=tmp_path, check=True,
+                              capture_output=True, text=True).stdout.strip()
+
+    git('init', '-q')
+    git('config', 'user.email', 'test@example.com')
+    git('config', 'user.name', 'Test User')
+    git('commit', '-q', '--allow-empty', '-m', 'initial')
+    git('tag', '-a', 'v1.2.3', '-m', 'release')
+    git('commit', '-q', '--allow-empty', '-m', 'second')
+    git('commit', '-q', '--allow-empty', '-m', 'third')
+    return git
+
+
+class TestCommitCountCache:
+    """Unit tests for the latest tag lookup and its commit count cache"""
+
+    def test_cache_miss_counts_and_stores(self, repo):
+        """Test that a miss runs rev-list and records the count under tag..HEAD"""
+        tag, count = version_operations.get_latest_tag_and_count('v*')
+
+        assert (tag, count) == ('v1.2.3', 2)
+        key = f"{repo('rev-parse', 'v1.2.3')}..{repo('rev-parse', 'HEAD')}"
+        assert version_operations._load_count_cache() == {key: 2}
+
+    def test_cache_hit_skips_rev_list(self, repo):
+        """Test that a cached count is returned without counting again"""
+        key = f"{repo('rev-parse', 'v1.2.3')}..{repo('rev-parse', 'HEAD')}"
+        version_operations._store_count_cache({key: 7})
+
+        with patch.object(version_operations, 'get_commit_count_since_tag') as mock_count:
+            tag, count = version_operations.get_latest_tag_and_count('v*')
+
+        assert (tag, count) == ('v1.2.3', 7)
+        mock_count.assert_not_called()
+
+    def test_cache_miss_for_new_head(self, repo):
+        """Test that an entry for another HEAD is not reused"""
+        version_operations.get_latest_tag_and_count('v*')
+        repo('commit', '-q', '--allow-empty', '-m', 'fourth')
+
+        assert version_operations.get_latest_tag_and_count('v*') == ('v1.2.3', 3)
+        assert sorted(version_operations._load_count_cache().values()) == [2, 3]
+
+    def test_no_cache_write_in_shallow_clone(self, repo, tmp_path):
+        """Test that counts taken while .git/shallow exists are not cached"""
+        (tmp_path / '.git' / 'shallow').write_text('')
+
+        with patch.object(version_operations, 'get_commit_count_since_tag', return_value=1):
+            assert version_operations.get_latest_tag_and_count('v*') == ('v1.2.3', 1)
+
+        assert not os.path.exists(version_operations._COUNT_CACHE_PATH)
+
+    def test_head_on_tag_skips_rev_list(self, repo):
+        """Test that HEAD at the tagged commit returns 0 without counting"""
+        repo('tag', 'v1.2.4')
+
+        with patch.object(version_operations, 'get_commit_count_since_tag') as mock_count:
+            assert version_operations.get_latest_tag_and_count('v*') == ('v1.2.4', 0)
+
+        mock_count.assert_not_called()
+
+    def test_no_matching_tag(self, repo):
+        """Test that no matching tag returns (None, 0)"""
+        assert version_operations.get_latest_tag_and_count('release-*') == (None, 0)
+
+    def test_unreadable_cache_is_empty(self, tmp_path, monkeypatch):
+        """Test that a malformed cache file loads as an empty cache"""
+        monkeypatch.chdir(tmp_path)
+        os.makedirs(os.path.dirname(version_operations._COUNT_CACHE_PATH))
+        with open(version_operations._COUNT_CACHE_PATH, 'w') as f:
+            f.write('abc..def x\nnot-a-line\n')
+
+        assert version_operations._load_count_cache() == {}
+
+
+class TestFetchTags:
+    """Unit tests for fetching tags in shallow CI clones"""
+
+    def test_unshallows_in_gitlab_ci(self, tmp_path, monkeypatch):
+        """Test that a shallow GitLab CI clone fetches tags and history once"""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv('GITLAB_CI', 'true')
+        (tmp_path / '.git').mkdir()
+        (tmp_path / '.git' / 'shallow').write_text('')
+
+        with patch.object(version_operations.subprocess, 'run') as mock_run:
+            mock_run.return_value = subprocess.CompletedProcess([], 0, '', '')
+            version_operations.fetch_tags()
+
+        args = mock_run.call_args[0][0]
+        assert args[-5:] == ['fetch', '--tags', '--unshallow', '--quiet', 'origin']
+
+    @pytest.mark.parametrize('gitlab_ci, shallow', [(True, False), (False, True)])
+    def test_skipped(self, gitlab_ci, shallow, tmp_path, monkeypatch):
+        """Test that full clones and runs outside GitLab CI fetch nothing"""
+        monkeypatch.chdir(tmp_path)
+        if gitlab_ci:
+            monkeypatch.setenv('GITLAB_CI', 'true')
+        else:
+            monkeypatch.delenv('GITLAB_CI', raising=False)
+        (tmp_path / '.git').mkdir()
+        if shallow:
+            (tmp_path / '.git' / 'shallow').write_text('')
+
+        with patch.object(version_operations.subprocess, 'run') as mock_run:
+            version_operations.fetch_tags()
+
+        mock_run.assert_not_called()
+
+
+class TestVersionParsing:
+    """Unit tests for the str fast paths and their regex fallbacks"""
+
+    @pytest.mark.parametrize('version, prefix', [
+        ('v1.2.3', 'v'), ('v10.0.100', 'v'), ('1.2.3', ''), ('release-4.5.6', 'release-'),
+        ('v1.2', 'v'), ('v1.2.3.4', 'v'), ('v1.2.x', 'v'), ('1.2.3', 'v'), ('v1..3', 'v'),
+        ('v1.2.3-rc1', 'v'), ('v-1.2.3', 'v'), ('v1.2.3\n', 'v'), ('v١.2.3', 'v'),
+    ])
+    def test_split_matches_regex(self, version, prefix):
+        """Test that _split_version agrees with the validate regex"""
+        fast = version_operations._split_version(version, prefix)
+        slow = version_operations._validate_pattern(prefix).match(version)
+
+        assert (fast is not None) == (slow is not None)
+        if fast is not None:
+            parsed = version_operations._parse_pattern(prefix).match(version)
+            assert fast == tuple(map(int, parsed.groups()))
+
+    @pytest.mark.parametrize('version', ['v1.2', 'v1.2.3.4', 'v1.2.x', 'x1.2.3', 'v1.2.3-rc1'])
+    def test_validate_rejects(self, version):
+        """Test that invalid versions exit via the regex fallback"""
+        with pytest.raises(SystemExit):
+            version_operations.validate_version_format(version, 'v')
+
+    def test_validate_accepts(self):
+        """Test that plain versions pass the fast path"""
+        assert version_operations.validate_version_format('v1.2.3', 'v') is True
+        assert version_operations.validate_version_format('1.2.3', '') is True
+
+
+class TestMark:
+    """Unit tests for status markers on limited stdout encodings"""
+
+    def test_ascii_stdout_uses_fallback(self, monkeypatch):
+        """Test that an ASCII stdout gets the fallback marker"""
+        monkeypatch.setattr(sys, 'stdout', io.TextIOWrapper(io.BytesIO(), encoding='ascii'))
+        assert version_operations._mark('✅', '[ok]') == '[ok]'
+
+    def test_utf8_stdout_keeps_symbol(self, monkeypatch):
+        """Test that a UTF-8 stdout keeps the emoji"""
+        monkeypatch.setattr(sys, 'stdout', io.TextIOWrapper(io.BytesIO(), encoding='utf-8'))
+        assert version_operations._mark('✅', '[ok]') == '✅'
@@ -5,28 +5,122 @@ Calculates semantic versions based on git tags and commit history
 """
 
 import os
+import shutil
 import subprocess
-import re
 import sys
-from pathlib import Path
+from collections import namedtuple
+from functools import lru_cache
+
+# With an absolute path and close_fds=False, subprocess can use
+# posix_spawn and skips sweeping every inherited descriptor
+_GIT = shutil.which('git') or 'git'
+
+def _mark(symbol, fallback):
+    """Return symbol if stdout can encode it, else the ASCII fallback.
+    
+    Runners with a POSIX/C locale get an ASCII stdout that cannot
+    print emoji.
+    """
+    try:
+        symbol.encode(sys.stdout.encoding or 'ascii')
+    except (UnicodeEncodeError, LookupError):
+        return fallback
+    return symbol
+
+# Possessive quantifiers (Python 3.11+) never backtrack into the digits
+_DIGITS = r'\d++' if sys.version_info >= (3, 11) else r'\d+'
+
+@lru_cache(maxsize=8)
+def _validate_pattern(prefix):
+    """Compiled, fully anchored pattern for prefix + 'X.Y.Z'."""
+    # Imported here so runs that never fall back to a regex skip loading re
+    import re
+    return re.compile(rf'\A{re.escape(prefix)}{_DIGITS}\.{_DIGITS}\.{_DIGITS}\Z')
+
+@lru_cache(maxsize=8)
+def _parse_pattern(prefix):
+    """Compiled pattern capturing X, Y and Z after prefix.
+    
+    Only anchored at the start so suffixed tags such as v1.2.3-rc1 still
+    yield their X.Y.Z.
+    """
+    import re
+    return re.compile(rf'\A{re.escape(prefix)}({_DIGITS})\.({_DIGITS})\.({_DIGITS})')
+
+def _split_version(version, prefix):
+    """Fast path for prefix + 'X.Y.Z': the three integers, or None."""
+    if not version.startswith(prefix):
+        return None
+    parts = version[len(prefix):].split('.')
+    if len(parts) != 3 or not all(part.isdecimal() for part in parts):
+        return None
+    return int(parts[0]), int(parts[1]), int(parts[2])
+
+def _git_command(*args):
+    """git argv that trusts the CI workspace for this command only.
+    
+    From git 2.38, safe.directory given with -c counts as protected
+    configuration, so this replaces a separate `git config --global`
+    run; setup_git covers older git.
+    """
+    workspace = os.environ.get('CI_PROJECT_DIR', '/builds')
+    return [_GIT, '-c', f'safe.directory={workspace}', *args]
+
+@lru_cache(maxsize=None)
+def _git_version():
+    """(major, minor) of the git in use, or (0, 0) if unknown."""
+    try:
+        output = subprocess.check_output([_GIT, '--version'], close_fds=False)
+        major, minor = output.split()[2].split(b'.')[:2]
+        return int(major), int(minor)
+    except (OSError, subprocess.CalledProcessError, IndexError, ValueError):
+        return 0, 0
 
 def setup_git():
-    """Configure git for GitLab CI environment."""
+    """Trust the CI workspace persistently where git needs it.
+    
+    Only needed when the workspace belongs to another user and git is
+    older than 2.38, which ignores safe.directory given with -c.
+    """
+    workspace = os.environ.get('CI_PROJECT_DIR', '/builds')
+    try:
+        if os.stat(workspace).st_uid == os.geteuid():
+            return
+    except (OSError, AttributeError):
+        pass
+    if _git_version() >= (2, 38):
+        return
+    
     try:
-        # GitLab CI already has workspace configured, but ensure it's safe
-        workspace = os.environ.get('CI_PROJECT_DIR', '/builds')
-        subprocess.check_output(['git', 'config', '--global', '--add', 'safe.directory', workspace], text=True)
+        subprocess.check_output([_GIT, 'config', '--global', '--add', 'safe.directory', workspace],
+                                text=True, close_fds=False)
     except subprocess.CalledProcessError as e:
         print(f"Warning: Error configuring git: {e}")
         # Continue - GitLab CI should already have git configured
 
+def fetch_tags():
+    """Fetch every tag and the full history in a shallow GitLab CI clone.
+    
+    A shallow clone (GIT_DEPTH > 0) may hold none of the tags and cannot
+    count commits back to them; one bulk fetch fixes both.
+    """
+    if not os.environ.get('GITLAB_CI') or not os.path.exists(os.path.join('.git', 'shallow')):
+        return
+    result = subprocess.run(
+        _git_command('fetch', '--tags', '--unshallow', '--quiet', 'origin'),
+        capture_output=True, text=True, close_fds=False)
+    if result.returncode != 0:
+        print(f"Warning: Error fetching tags: {result.stderr.strip()}")
+
 def get_latest_tag(tag_pattern='v*'):
     """Retrieve the latest version tag matching pattern."""
     try:
-        # Get all tags matching pattern
-        output = subprocess.check_output(['git', 'tag', '-l', tag_pattern, '--sort=-v:refname'], text=True).strip()
-        if output:
-            return output.splitlines()[0]
+        # Get all tags matching pattern; only the first line is decoded
+        output = subprocess.check_output(_git_command('tag', '-l', tag_pattern, '--sort=-v:refname'),
+                                         close_fds=False).strip()
+        head = output.partition(b'\n')[0]
+        if head:
+            return head.decode('utf-8')
         return None
     except subprocess.CalledProcessError as e:
         print(f"Error fetching tags: {e}")
@@ -35,87 +129,204 @@ def get_latest_tag(tag_pattern='v*'):
 def get_commit_count_since_tag(tag):
     """Count commits since the specified tag."""
     try:
-        output = subprocess.check_output(['git', 'rev-list', f'{tag}..HEAD', '--count'], text=True).strip()
-        return int(output)
+        # int() parses the ASCII digits straight from bytes
+        return int(subprocess.check_output(_git_command('rev-list', f'{tag}..HEAD', '--count'),
+                                           close_fds=False))
     except subprocess.CalledProcessError as e:
         print(f"Error counting commits: {e}")
         sys.exit(1)
 
+# Commit counts keyed by '<tag object>..<HEAD commit>'; both ids are
+# immutable, so entries never go stale. Kept in the GitLab CI cache as
+# one '<key> <count>' line per entry.
+_COUNT_CACHE_PATH = os.path.join('.cache', 'version', 'commit-counts')
+_COUNT_CACHE_LIMIT = 256
+
+def _head_sha():
+    """Read the commit HEAD points at from .git without running git."""
+    try:
+        with open(os.path.join('.git', 'HEAD')) as f:
+            head = f.read().strip()
+        if head.startswith('ref: '):
+            with open(os.path.join('.git', head[5:])) as f:
+                head = f.read().strip()
+    except OSError:
+        return None
+    
+    if len(head) in (40, 64) and all(c in '0123456789abcdef' for c in head):
+        return head
+    return None
+
+def _load_count_cache():
+    """Load cached commit counts, or an empty cache if unreadable."""
+    cache = {}
+    try:
+        with open(_COUNT_CACHE_PATH) as f:
+            for line in f:
+                key, _, count = line.partition(' ')
+                if count.strip().isdecimal():
+                    cache[key] = int(count)
+    except (OSError, UnicodeDecodeError):
+        return {}
+    return cache
+
+def _store_count_cache(cache):
+    """Write the commit count cache, keeping only the newest entries."""
+    entries = list(cache.items())[-_COUNT_CACHE_LIMIT:]
+    try:
+        os.makedirs(os.path.dirname(_COUNT_CACHE_PATH), exist_ok=True)
+        tmp_path = _COUNT_CACHE_PATH + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(''.join(f'{key} {count}\n' for key, count in entries))
+        os.replace(tmp_path, _COUNT_CACHE_PATH)
+    except OSError as e:
+        print(f"Warning: Could not write version cache: {e}")
+
+def get_latest_tag_and_count(tag_pattern='v*'):
+    """Return the latest tag matching pattern and the commits since it.
+    
+    One for-each-ref reports the newest tag together with its object id
+    and peeled commit, then one rev-list counts from that id unless HEAD
+    is the tagged commit. Returns (None, 0) when no tag matches.
+    """
+    ref_pattern = tag_pattern if tag_pattern.startswith('refs/') else f'refs/tags/{tag_pattern}'
+    try:
+        result = subprocess.run(
+            _git_command('for-each-ref', '--count=1', '--sort=-v:refname',
+                         '--format=%(refname:lstrip=2)%00%(objectname)%00%(*objectname)', ref_pattern),
+            capture_output=True, check=True, close_fds=False)
+    except subprocess.CalledProcessError:
+        # Older git without version sorting in for-each-ref
+        latest_tag = get_latest_tag(tag_pattern)
+        if not latest_tag:
+            return None, 0
+        return latest_tag, get_commit_count_since_tag(latest_tag)
+    
+    line = result.stdout.strip()
+    if not line:
+        return None, 0
+    tag_name, _, object_names = line.partition(b'\0')
+    object_name, _, peeled_name = object_names.partition(b'\0')
+    latest_tag, object_id = tag_name.decode('utf-8'), object_name.decode('ascii')
+    # Annotated tags peel to their commit; lightweight tags are the commit
+    tagged_commit = peeled_name.decode('ascii') or object_id
+    
+    # Just tagged: HEAD is the tagged commit, nothing to count
+    head = _head_sha()
+    if head and head == tagged_commit:
+        return latest_tag, 0
+    
+    # Reuse a count from an earlier job run against the same commits
+    key = f'{object_id}..{head}' if object_id and head else None
+    cache = _load_count_cache() if key else {}
+    if key in cache:
+        return latest_tag, cache[key]
+    
+    commit_count = get_commit_count_since_tag(object_id or latest_tag)
+    # A shallow clone (fetch_tags skipped or failed) can undercount, and
+    # the ids in the key would keep that wrong count forever
+    if key and not os.path.exists(os.path.join('.git', 'shallow')):
+        cache.pop(key, None)
+        cache[key] = commit_count
+        _store_count_cache(cache)
+    return latest_tag, commit_count
+
 def validate_version_format(version, prefix):
     """Validate version string format."""
-    pattern = f'^{prefix}\\d+\\.\\d+\\.\\d+$'
-    if not re.match(pattern, version):
+    # Fast path: prefix plus exactly two dots between digit runs, checked
+    # without converting anything to int
+    if version.startswith(prefix):
+        core = version[len(prefix):]
+        if core.count('.') == 2 and all(part.isdecimal() for part in core.split('.')):
+            return True
+    # Slow path, which also produces the error for invalid versions
+    if not _validate_pattern(prefix).match(version):
         print(f"Invalid version format: {version}")
         sys.exit(1)
     return True
 
 def write_gitlab_outputs(outputs):
-    """Write outputs to dotenv file for GitLab CI"""
-    output_file = Path('operation_outputs.env')
-    with open(output_file, 'w') as f:
-        for key, value in outputs.items():
-            f.write(f'{key.upper()}={value}\n')
-    print(f"✓ Outputs written to {output_file}")
+    """Write outputs, keyed by their dotenv variable names, for GitLab CI"""
+    output_file = 'operation_outputs.env'
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(''.join(f'{key}={value}\n' for key, value in outputs.items()))
+    print(f"{_mark('✓', '[ok]')} Outputs written to {output_file}")
+
+# Inputs resolved once per run; immutable and without a per-instance dict
+Config = namedtuple('Config', ['default_version', 'version_prefix', 'tag_pattern'])
+
+def load_config():
+    """Read the calculator inputs from GitLab CI environment variables."""
+    env = os.environ
+    return Config(env.get('DEFAULT_VERSION', 'v0.1.0'),
+                  env.get('VERSION_PREFIX', 'v'),
+                  env.get('TAG_PATTERN', 'v*'))
 
 def main():
     """Main function."""
-    print("🏷️ GitLab Version Calculator")
-    print("=" * 40)
+    # Never fail on characters the log encoding lacks, e.g. in tag names
+    if hasattr(sys.stdout, 'reconfigure'):
+        sys.stdout.reconfigure(errors='replace')
     
-    # Get inputs from GitLab CI environment variables
-    default_version = os.environ.get('DEFAULT_VERSION', 'v0.1.0')
-    version_prefix = os.environ.get('VERSION_PREFIX', 'v')
-    tag_pattern = os.environ.get('TAG_PATTERN', 'v*')
+    cfg = load_config()
+    default_version = cfg.default_version
+    version_prefix = cfg.version_prefix
+    tag_pattern = cfg.tag_pattern
     
-    print(f"Configuration:")
-    print(f"  Default Version: {default_version}")
-    print(f"  Version Prefix: {version_prefix}")
-    print(f"  Tag Pattern: {tag_pattern}")
-    print()
+    # Banner and configuration in one write
+    sys.stdout.write(f"{_mark('🏷️', '[tag]')} GitLab Version Calculator\n"
+                     f"{'=' * 40}\n"
+                     f"Configuration:\n"
+                     f"  Default Version: {default_version}\n"
+                     f"  Version Prefix: {version_prefix}\n"
+                     f"  Tag Pattern: {tag_pattern}\n"
+                     f"\n")
 
     # Validate inputs
     validate_version_format(default_version, version_prefix)
 
-    # Setup git
+    # Older git still needs the workspace trusted in the global config
     setup_git()
 
-    # Get latest tag
-    latest_tag = get_latest_tag(tag_pattern)
+    # Make sure every tag is present before looking for the latest
+    fetch_tags()
+
+    # Get latest tag and commit count since it; each git call trusts the
+    # workspace itself through _git_command
+    latest_tag, commit_count = get_latest_tag_and_count(tag_pattern)
     current_version = latest_tag if latest_tag else default_version
     
-    # Calculate commit count
-    commit_count = 0
-    if latest_tag:
-        commit_count = get_commit_count_since_tag(latest_tag)
-    
     # Calculate next version
     if latest_tag and commit_count > 0:
-        pattern = f'{version_prefix}(\\d+)\\.(\\d+)\\.(\\d+)'
-        match = re.match(pattern, latest_tag)
-        if not match:
-            print(f"Invalid version format: {latest_tag}")
-            sys.exit(1)
-        major, minor, patch = map(int, match.groups())
+        version = _split_version(latest_tag, version_prefix)
+        if version is None:
+            # Tags with a suffix, e.g. v1.2.3-rc1, still parse via the regex
+            match = _parse_pattern(version_prefix).match(latest_tag)
+            if not match:
+                print(f"Invalid version format: {latest_tag}")
+                sys.exit(1)
+            version = map(int, match.groups())
+        major, minor, patch = version
         next_version = f"{version_prefix}{major}.{minor}.{patch + commit_count}"
     else:
         next_version = current_version
 
     # Output results
-    print("Results:")
-    print(f"  Current Version: {current_version}")
-    print(f"  Next Version: {next_version}")
-    print(f"  Commit Count: {commit_count}")
-    print()
+    sys.stdout.write(f"Results:\n"
+                     f"  Current Version: {current_version}\n"
+                     f"  Next Version: {next_version}\n"
+                     f"  Commit Count: {commit_count}\n"
+                     f"\n")
     
     # Write outputs for GitLab CI
     outputs = {
-        'current_version': current_version,
-        'next_version': next_version,
-        'commit_count': str(commit_count)
+        'CURRENT_VERSION': current_version,
+        'NEXT_VERSION': next_version,
+        'COMMIT_COUNT': str(commit_count)
     }
     
     write_gitlab_outputs(outputs)
-    print("✅ Version calculation completed successfully")
+    print(f"{_mark('✅', '[ok]')} Version calculation completed successfully")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file